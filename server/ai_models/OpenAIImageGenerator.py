@@ -1,6 +1,11 @@
+import traceback
+from inspect import currentframe, getframeinfo
+import base64
 import os
 from datetime import datetime
 from ai_models.ImageGenerator import ImageGenerator
+from ai_models.scheduler import get_scheduler
+from fastapi import HTTPException
 from openai import AsyncOpenAI
 import openai
 key = os.environ.get("OPENAI_KEY")
@@ -10,17 +15,19 @@ class OpenAIImageGenerator(ImageGenerator):
 	async def generate_single_image(self, idx, prompt, callback, user_id, task_id):
 		start = datetime.now()
 		try:
-			response = await client.images.generate(
-				model="dall-e-2",
-				prompt= prompt,
-				n=1,
-				size="512x512",
-				response_format="b64_json"
-			)
+			async with get_scheduler('openai').slot():
+				response = await client.images.generate(
+					model="dall-e-2",
+					prompt= prompt,
+					n=1,
+					size="512x512",
+					response_format="b64_json"
+				)
 
+			image_bytes = base64.b64decode(response.data[0].b64_json)
 			duration = datetime.now() - start
-			await callback(user_id, task_id, idx, False, duration, response.data[0].b64_json, 'openai')
-			return idx, response.data[0].b64_json, 'openai'
+			await callback(user_id, task_id, idx, False, duration, image_bytes, 'openai')
+			return idx, image_bytes, 'openai'
 		except openai.OpenAIError as e:
 			duration = datetime.now() - start
 			await callback(user_id, task_id, idx, True, duration)
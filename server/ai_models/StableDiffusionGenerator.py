@@ -5,7 +5,8 @@ import os
 import json
 from random import random
 from ai_models.ImageGenerator import ImageGenerator
-import boto3
+from ai_models.scheduler import get_scheduler
+from aws_utils import get_bedrock_client
 import asyncio
 from botocore.exceptions import ClientError, BotoCoreError
 from fastapi import HTTPException
@@ -17,7 +18,7 @@ class StableDiffusionGenerator(ImageGenerator):
     async def generate_single_image(self, idx, prompt, callback, user_id, task_id):
         start = datetime.now()
         try:
-            bedrock = boto3.client(service_name='bedrock-runtime', region_name='us-east-1', aws_access_key_id=os.environ.get("AWS_ACCESS_KEY_ID"), aws_secret_access_key=os.environ.get("AWS_SECRET_ACCESS_KEY"))
+            bedrock = get_bedrock_client()
             accept = "application/json"
             content_type = "application/json"
             num = int(random() * 10000)
@@ -34,27 +35,25 @@ class StableDiffusionGenerator(ImageGenerator):
                 }
             json_body = json.dumps(body) 
             byte_body = json_body.encode('utf-8')
-            loop = asyncio.get_event_loop()
-            response = await loop.run_in_executor(None, self.invoke_model_with_args, bedrock, byte_body, accept, content_type)
+            response = await get_scheduler('stable-diffusion').run(self.invoke_model_with_args, bedrock, byte_body, accept, content_type)
             response_body = json.loads(response.get("body").read())             
-            base64_image = response_body.get("artifacts")[0].get("base64")
-            base64_bytes = base64_image.encode('ascii')
-            image_bytes = base64.b64decode(base64_bytes)
+            image_bytes = base64.b64decode(response_body.get("artifacts")[0].get("base64"))
 
             duration = datetime.now() - start
-            callback(user_id, task_id, idx, False, duration, base64.b64encode(image_bytes).decode('utf-8'), 'stable-diffusion')
-            return idx, base64.b64encode(image_bytes).decode('utf-8'), 'stable-diffusion'
+            await callback(user_id, task_id, idx, False, duration, image_bytes, 'stable-diffusion')
+            return idx, image_bytes, 'stable-diffusion'
         except ClientError as e:
             duration = datetime.now() - start
-            callback(user_id, task_id, idx, True, duration)
-            return handle_boto3_error(e)
+            await callback(user_id, task_id, idx, True, duration)
+            handle_boto3_error(e)  # raises the matching HTTPException
+            raise
         except BotoCoreError as e:
             duration = datetime.now() - start
-            callback(user_id, task_id, idx, True, duration)
+            await callback(user_id, task_id, idx, True, duration)
             raise HTTPException(status_code=500, detail={'message':f"AWS Botocore Error: {str(e)}",'currentFrame': getframeinfo(currentframe()), 'detail': str(traceback.format_exc())})
         except Exception as e:
             duration = datetime.now() - start
-            callback(user_id, task_id, idx, True, duration)
+            await callback(user_id, task_id, idx, True, duration)
             raise HTTPException(status_code=500, detail={'message':f"generate with bedrock error{str(e)}",'currentFrame': getframeinfo(currentframe()), 'detail': str(traceback.format_exc())})
         
     def invoke_model_with_args(self, bedrock, byte_body, accept, content_type):
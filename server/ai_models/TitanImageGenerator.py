@@ -5,7 +5,8 @@ import os
 import json
 from random import random
 from ai_models.ImageGenerator import ImageGenerator
-import boto3
+from ai_models.scheduler import get_scheduler
+from aws_utils import get_bedrock_client
 import asyncio
 from botocore.exceptions import ClientError, BotoCoreError 
 import botocore
@@ -17,7 +18,7 @@ class TitanImageGenerator(ImageGenerator):
     async def generate_single_image(self, idx, prompt, callback, user_id, task_id):
         start = datetime.now()
         try:
-            bedrock = boto3.client(service_name='bedrock-runtime', region_name='us-east-1', aws_access_key_id=os.environ.get("AWS_ACCESS_KEY_ID"), aws_secret_access_key=os.environ.get("AWS_SECRET_ACCESS_KEY"))
+            bedrock = get_bedrock_client()
             accept = "application/json"
             content_type = "application/json"
             num = int(random() * 10000)
@@ -36,19 +37,17 @@ class TitanImageGenerator(ImageGenerator):
             }
             json_body = json.dumps(body)
             byte_body = json_body.encode('utf-8')
-            loop = asyncio.get_event_loop()
-            response = await loop.run_in_executor(None, self.invoke_model_with_args,bedrock, byte_body, accept, content_type)
+            response = await get_scheduler('titan').run(self.invoke_model_with_args, bedrock, byte_body, accept, content_type)
             response_body = json.loads(response.get("body").read())
-            base64_image = response_body.get("images")[0]            
-            base64_bytes = base64_image.encode('ascii')
-            image_bytes = base64.b64decode(base64_bytes)
+            image_bytes = base64.b64decode(response_body.get("images")[0])
             duration = datetime.now() - start
-            await callback(user_id, task_id, idx, False, duration, base64.b64encode(image_bytes).decode('utf-8'), 'titan')
-            return idx, base64.b64encode(image_bytes).decode('utf-8'), 'titan'
+            await callback(user_id, task_id, idx, False, duration, image_bytes, 'titan')
+            return idx, image_bytes, 'titan'
         except ClientError as e:
             duration = datetime.now() - start
             await callback(user_id, task_id, idx, True, duration)
-            return handle_boto3_error(e)
+            handle_boto3_error(e)  # raises the matching HTTPException
+            raise
         except BotoCoreError as e:
             duration = datetime.now() - start
             await callback(user_id, task_id, idx, True, duration)
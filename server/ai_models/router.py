@@ -0,0 +1,152 @@
+import os
+import time
+import logging
+from collections import deque
+import openai
+from botocore.exceptions import BotoCoreError, ClientError
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Providers in preference order while there is no data yet. Stable Diffusion is opt-in, e.g.
+# IMAGE_PROVIDERS=titan,openai,stable-diffusion
+IMAGE_PROVIDERS = [name.strip() for name in os.environ.get("IMAGE_PROVIDERS", "titan,openai").split(",") if name.strip()]
+# assumed latency in seconds until a provider has PROVIDER_MIN_SAMPLES results
+EXPECTED_LATENCY = {
+    "titan": 8.0,
+    "openai": 10.0,
+    "stable-diffusion": 12.0,
+}
+PROVIDER_STATS_WINDOW = int(os.environ.get("PROVIDER_STATS_WINDOW", 50))
+PROVIDER_MIN_SAMPLES = int(os.environ.get("PROVIDER_MIN_SAMPLES", 5))
+# the breaker opens after this many failures in a row, or when the error rate over the window gets this high
+PROVIDER_BREAKER_FAILURES = int(os.environ.get("PROVIDER_BREAKER_FAILURES", 3))
+PROVIDER_BREAKER_ERROR_RATE = float(os.environ.get("PROVIDER_BREAKER_ERROR_RATE", 0.5))
+PROVIDER_BREAKER_COOLDOWN = float(os.environ.get("PROVIDER_BREAKER_COOLDOWN", 30))
+# Bedrock error codes that mean the provider is overloaded rather than the request being bad
+BEDROCK_THROTTLING_CODES = {
+    "ThrottlingException",
+    "LimitExceededException",
+    "ServiceQuotaExceededException",
+    "TooManyRequestsException",
+    "ModelTimeoutException",
+    "ModelNotReadyException",
+}
+
+
+def is_provider_failure(error) -> bool:
+    """Whether a failed call counts against the provider. Throttling, 5xx, timeouts and connection
+    errors do; rejections of the request itself (content policy, validation) don't, they say
+    nothing about the provider's health. The generators wrap provider errors in an HTTPException,
+    so the chain is walked down to the original."""
+    while error is not None:
+        if isinstance(error, ClientError):
+            code = error.response.get("Error", {}).get("Code")
+            status = error.response.get("ResponseMetadata", {}).get("HTTPStatusCode") or 500
+            return code in BEDROCK_THROTTLING_CODES or status == 429 or status >= 500
+        if isinstance(error, openai.APIStatusError):
+            return error.status_code == 429 or error.status_code >= 500
+        if isinstance(error, (openai.OpenAIError, BotoCoreError)):
+            return True  # connection errors and timeouts
+        error = error.__cause__ or error.__context__
+    return True
+
+
+def _percentile(values, percentile):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * percentile))]
+
+
+class ProviderHealth:
+    """Rolling latency and error rate of one provider, plus its circuit breaker."""
+
+    def __init__(self, name: str):
+        self.name = name
+        self.results = deque(maxlen=PROVIDER_STATS_WINDOW)  # (latency seconds, succeeded)
+        self.consecutive_failures = 0
+        self.open_until = None  # set while the breaker is open
+
+    def record(self, latency: float, succeeded: bool):
+        self.results.append((latency, succeeded))
+        if succeeded:
+            self.consecutive_failures = 0
+            if self.open_until is not None:
+                logger.info(f"Provider {self.name} recovered, closing its circuit breaker")
+                self.open_until = None
+                # the failures that opened the breaker would reopen it on the next single error
+                self.results.clear()
+                self.results.append((latency, succeeded))
+            return
+
+        self.consecutive_failures += 1
+        if self.consecutive_failures >= PROVIDER_BREAKER_FAILURES or (
+            len(self.results) >= PROVIDER_MIN_SAMPLES and self.error_rate() >= PROVIDER_BREAKER_ERROR_RATE
+        ):
+            if self.open_until is None:
+                logger.warning(f"Provider {self.name} is failing ({self.consecutive_failures} in a row, error rate {self.error_rate():.2f}), opening its circuit breaker")
+            self.open_until = time.monotonic() + PROVIDER_BREAKER_COOLDOWN
+
+    def error_rate(self) -> float:
+        if not self.results:
+            return 0.0
+        return sum(1 for _, succeeded in self.results if not succeeded) / len(self.results)
+
+    def latency(self, percentile: float):
+        latencies = [latency for latency, succeeded in self.results if succeeded]
+        return _percentile(latencies, percentile) if latencies else None
+
+    def expected_latency(self) -> float:
+        p50 = self.latency(0.5)
+        if p50 is None or len(self.results) < PROVIDER_MIN_SAMPLES:
+            return EXPECTED_LATENCY.get(self.name, max(EXPECTED_LATENCY.values()))
+        return p50
+
+    def available(self) -> bool:
+        return self.open_until is None or time.monotonic() >= self.open_until
+
+    def probing(self):
+        """Called when a half-open provider is handed out: its probe is the only call until the
+        probe's result is recorded or another cooldown has passed."""
+        if self.open_until is not None:
+            self.open_until = time.monotonic() + PROVIDER_BREAKER_COOLDOWN
+
+    def stats(self) -> dict:
+        p50, p95 = self.latency(0.5), self.latency(0.95)
+        return {
+            "samples": len(self.results),
+            "p50_seconds": round(p50, 2) if p50 is not None else None,
+            "p95_seconds": round(p95, 2) if p95 is not None else None,
+            "error_rate": round(self.error_rate(), 3),
+            "breaker": "closed" if self.open_until is None else ("half-open" if self.available() else "open"),
+        }
+
+
+class ProviderRouter:
+    """Orders image providers by expected latency, leaving out those with an open breaker."""
+
+    def __init__(self, names):
+        self.providers = {name: ProviderHealth(name) for name in names}
+
+    def record(self, name: str, latency: float, succeeded: bool):
+        if name in self.providers:
+            self.providers[name].record(latency, succeeded)
+
+    def choose(self, count: int = 2) -> list:
+        """Returns up to `count` provider names, fastest first. Providers with an open breaker
+        are left out, even if that leaves fewer than `count`. Once its cooldown is over a
+        provider is half-open and is handed out for a single probe call."""
+        ranked = sorted(self.providers.values(), key=lambda provider: provider.expected_latency())
+        chosen = [provider for provider in ranked if provider.available()][:count]
+        for provider in chosen:
+            provider.probing()
+        return [provider.name for provider in chosen]
+
+    def stats(self) -> dict:
+        return {name: provider.stats() for name, provider in self.providers.items()}
+
+
+provider_router = ProviderRouter(IMAGE_PROVIDERS)
+
+
+def get_provider_stats() -> dict:
+    return provider_router.stats()
@@ -0,0 +1,104 @@
+import os
+import time
+import asyncio
+import logging
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import asynccontextmanager
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Max concurrent calls per provider, override with e.g. TITAN_MAX_IN_FLIGHT=4
+DEFAULT_MAX_IN_FLIGHT = {
+    "titan": 6,
+    "openai": 6,
+    "stable-diffusion": 4,
+}
+
+
+class ProviderScheduler:
+    """Caps in-flight calls to one image provider.
+
+    Callers beyond the cap wait in a FIFO queue. Blocking SDK calls run on the
+    provider's own thread pool so a burst of generations cannot starve the
+    default executor used for PIL work and S3 uploads.
+    """
+
+    def __init__(self, name: str, max_in_flight: int):
+        self.name = name
+        self.max_in_flight = max_in_flight
+        self.executor = ThreadPoolExecutor(max_workers=max_in_flight, thread_name_prefix=f"{name}-provider")
+        self.in_flight = 0
+        self._waiters = deque()
+        self._started = 0
+        self._total_wait = 0.0
+        self._max_wait = 0.0
+
+    async def _acquire(self):
+        if self.in_flight < self.max_in_flight and not self._waiters:
+            self.in_flight += 1
+            return
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters.append(waiter)
+        try:
+            await waiter  # the releasing caller hands its slot over, in_flight is unchanged
+        except asyncio.CancelledError:
+            if waiter.done() and not waiter.cancelled():
+                self._release()
+            elif waiter in self._waiters:
+                self._waiters.remove(waiter)
+            raise
+
+    def _release(self):
+        while self._waiters:
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                waiter.set_result(None)
+                return
+        self.in_flight -= 1
+
+    @asynccontextmanager
+    async def slot(self):
+        queued_at = time.monotonic()
+        await self._acquire()
+        wait = time.monotonic() - queued_at
+        self._started += 1
+        self._total_wait += wait
+        self._max_wait = max(self._max_wait, wait)
+        if wait > 1:
+            logger.info(f"{self.name} provider call waited {wait:.2f} seconds, queue depth {len(self._waiters)}")
+        try:
+            yield
+        finally:
+            self._release()
+
+    async def run(self, func, *args):
+        async with self.slot():
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self.executor, func, *args)
+
+    def stats(self) -> dict:
+        return {
+            "max_in_flight": self.max_in_flight,
+            "in_flight": self.in_flight,
+            "queue_depth": len(self._waiters),
+            "started": self._started,
+            "avg_wait_seconds": round(self._total_wait / self._started, 3) if self._started else 0.0,
+            "max_wait_seconds": round(self._max_wait, 3),
+        }
+
+
+_schedulers = {}
+
+
+def get_scheduler(name: str) -> ProviderScheduler:
+    if name not in _schedulers:
+        env_key = f"{name.upper().replace('-', '_')}_MAX_IN_FLIGHT"
+        max_in_flight = int(os.environ.get(env_key, DEFAULT_MAX_IN_FLIGHT.get(name, 4)))
+        _schedulers[name] = ProviderScheduler(name, max_in_flight)
+    return _schedulers[name]
+
+
+def get_scheduler_stats() -> dict:
+    return {name: scheduler.stats() for name, scheduler in _schedulers.items()}
@@ -1,59 +1,46 @@
-import base64
-from http.client import HTTPException
 import traceback
 from inspect import currentframe, getframeinfo
-import io
 import logging
-import boto3
-from botocore.exceptions import ClientError
-from PIL import Image
-from botocore.client import Config
+from fastapi import HTTPException
+from utils.image_pipeline import FULL, Rendition, decode_data_url, transcode_image, upload_renditions
+from aws_utils.clients import get_s3_client, get_bedrock_client, get_client, get_client_stats
+from aws_utils.presign import presigned_url_cache, get_presign_stats, PRESIGNED_URL_EXPIRATION
+from aws_utils.urls import image_url, image_urls, url_strategy
+from aws_utils.uploads import upload_image, upload_image_async, run_upload, gather_uploads
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+CART_THUMBNAIL_BUCKET = "thumbnails-cart"
 
-def generate_presigned_url(object_name, bucket_name, expiration=3600):
-    # Generate a presigned URL for the S3 object
-    s3_client = boto3.client('s3', region_name='us-east-2',
-                  config=Config(signature_version='s3v4'))
-    try:
-        response = s3_client.generate_presigned_url(
-            "get_object",
-            Params={"Bucket": bucket_name, "Key": object_name + ".jpg"},
-            ExpiresIn=expiration,
-        )
-    except ClientError as e:
-        logging.error(e)
-        return None
-    # print(object_name)
-    return response
-
-
-def processAndSaveImage(image_data: str, img_id: str, s3_bucket_name: str):
+
+def generate_presigned_url(object_name, bucket_name, expiration=PRESIGNED_URL_EXPIRATION):
+    # Presigned URL for the S3 object, reused from the cache while it is still valid long enough
+    return presigned_url_cache.get(bucket_name, object_name, expiration)
+
+
+def generate_presigned_urls(object_names, bucket_name, expiration=PRESIGNED_URL_EXPIRATION) -> dict:
+    """Presigned URLs for many objects of one bucket, as {object_name: url}."""
+    return presigned_url_cache.get_many(bucket_name, object_names, expiration)
+
+
+async def processAndSaveImage(image_data: str, img_id: str, s3_bucket_name: str, rendition: Rendition = FULL):
+    """Transcodes a base64 image on the image pipeline and uploads it as {img_id}.jpg
+    (plus {img_id}.webp with IMAGE_WEBP_RENDITIONS), all from a single decode."""
     try:
-        image_data = image_data.split(",", 1)[1]
-        image_bytes = base64.b64decode(image_data)
-        image = Image.open(io.BytesIO(image_bytes))
-        if image.mode == "RGBA":
-            background = Image.new("RGB", image.size, (255, 255, 255))
-            background.paste(image, mask=image.split()[3])  # 3 is the alpha channel
-            image = background
-
-        buffered = io.BytesIO()
-        image.save(buffered, format="JPEG", quality=85)
-        compressed_image_bytes = buffered.getvalue()
-        s3_client = boto3.client('s3', region_name='us-east-2',
-                  config=Config(signature_version='s3v4'))
-        image_key = f"{img_id}.jpg"
-
-        s3_client.upload_fileobj(
-            io.BytesIO(compressed_image_bytes),
-            s3_bucket_name,
-            image_key,
-            ExtraArgs={"ACL": "public-read", "ContentType": "image/jpeg", "ContentDisposition": "inline"},
-        )
+        renditions = upload_renditions(rendition)
+        outputs, _ = await transcode_image(decode_data_url(image_data), renditions)
+        await gather_uploads(*(
+            upload_image_async(outputs[output.name], s3_bucket_name, f"{img_id}.{output.extension}", output.content_type)
+            for output in renditions
+        ))
         return True
     except Exception as error:
         logger.error(f"Error in processAndSaveImage: {error}")
-        raise HTTPException(status_code=500, detail={'message':"Internal Server Error", 'currentFrame': getframeinfo(currentframe()), 'detail': str(traceback.format_exc())})
\ No newline at end of file
+        raise HTTPException(status_code=500, detail={'message':"Internal Server Error", 'currentFrame': getframeinfo(currentframe()), 'detail': str(traceback.format_exc())})
+
+
+async def processAndSaveImages(uploads: list):
+    """Runs processAndSaveImage for every (image_data, img_id, s3_bucket_name, rendition)
+    at once, bounded by S3_UPLOAD_CONCURRENCY, and waits for all of them."""
+    return await gather_uploads(*(processAndSaveImage(*upload) for upload in uploads))
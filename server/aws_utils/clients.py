@@ -0,0 +1,52 @@
+import os
+import logging
+import threading
+import boto3
+from botocore.client import Config
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# boto3 clients are thread-safe once built, so one client per (service, region) is shared by
+# the whole process; building them is not, hence the lock.
+AWS_MAX_POOL_CONNECTIONS = int(os.environ.get("AWS_MAX_POOL_CONNECTIONS", 50))
+S3_REGION = "us-east-2"
+
+_clients = {}
+_client_stats = {}
+_lock = threading.Lock()
+
+
+def get_client(service_name: str, region_name: str, signature_version: str = None):
+    key = (service_name, region_name, signature_version)
+    with _lock:
+        stats = _client_stats.setdefault(service_name, {"created": 0, "reused": 0})
+        client = _clients.get(key)
+        if client is not None:
+            stats["reused"] += 1
+            return client
+
+        config = Config(
+            signature_version=signature_version,
+            max_pool_connections=AWS_MAX_POOL_CONNECTIONS,
+            tcp_keepalive=True,
+            retries={"max_attempts": 3, "mode": "standard"},
+        )
+        client = boto3.client(service_name, region_name=region_name, config=config)
+        _clients[key] = client
+        stats["created"] += 1
+        logger.info(f"Created {service_name} client for {region_name}, stats: {stats}")
+        return client
+
+
+def get_s3_client():
+    return get_client("s3", S3_REGION, signature_version="s3v4")
+
+
+def get_bedrock_client():
+    return get_client("bedrock-runtime", "us-east-1")
+
+
+def get_client_stats() -> dict:
+    with _lock:
+        return {service: dict(stats) for service, stats in _client_stats.items()}
@@ -0,0 +1,99 @@
+import os
+import time
+import logging
+import threading
+from collections import OrderedDict
+from botocore.exceptions import ClientError
+from aws_utils.clients import get_s3_client
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+PRESIGNED_URL_EXPIRATION = 3600
+# a cached URL is handed out until it has less than this many seconds left, so callers
+# always get a URL that stays valid at least that long
+PRESIGNED_URL_MIN_REMAINING = int(os.environ.get("PRESIGNED_URL_MIN_REMAINING", 600))
+PRESIGNED_URL_CACHE_SIZE = int(os.environ.get("PRESIGNED_URL_CACHE_SIZE", 20000))
+
+
+def sign_url(bucket_name: str, object_name: str, expiration: int) -> str:
+    s3_client = get_s3_client()
+    return s3_client.generate_presigned_url(
+        "get_object",
+        Params={"Bucket": bucket_name, "Key": object_name + ".jpg"},
+        ExpiresIn=expiration,
+    )
+
+
+class PresignedUrlCache:
+    """LRU of presigned URLs keyed by (bucket, key), each reused until close to its expiry."""
+
+    def __init__(self, max_size: int = PRESIGNED_URL_CACHE_SIZE):
+        self.max_size = max_size
+        self._urls = OrderedDict()  # (bucket, key) -> (url, expires_at)
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def _lookup(self, cache_key, min_remaining: float):
+        cached = self._urls.get(cache_key)
+        if cached is not None and cached[1] - time.monotonic() >= min_remaining:
+            self._urls.move_to_end(cache_key)
+            self.hits += 1
+            return cached[0]
+        self.misses += 1
+        return None
+
+    def _store(self, cache_key, url: str, expiration: int):
+        self._urls[cache_key] = (url, time.monotonic() + expiration)
+        self._urls.move_to_end(cache_key)
+        while len(self._urls) > self.max_size:
+            self._urls.popitem(last=False)
+
+    def get_many(self, bucket_name: str, object_names, expiration: int = PRESIGNED_URL_EXPIRATION) -> dict:
+        """URLs for every object name, signing only the ones not cached. Names that fail to
+        sign map to None."""
+        # short-lived URLs are reused too, as long as they outlive what was asked for
+        min_remaining = min(PRESIGNED_URL_MIN_REMAINING, expiration)
+        urls, missing = {}, []
+        with self._lock:
+            for object_name in dict.fromkeys(object_names):
+                url = self._lookup((bucket_name, object_name), min_remaining)
+                if url is None:
+                    missing.append(object_name)
+                urls[object_name] = url
+
+        # signing is local HMAC work, done outside the lock
+        signed = {}
+        for object_name in missing:
+            try:
+                signed[object_name] = sign_url(bucket_name, object_name, expiration)
+            except ClientError as e:
+                logger.error(e)
+                signed[object_name] = None
+        with self._lock:
+            for object_name, url in signed.items():
+                if url is not None:
+                    self._store((bucket_name, object_name), url, expiration)
+        urls.update(signed)
+        return urls
+
+    def get(self, bucket_name: str, object_name: str, expiration: int = PRESIGNED_URL_EXPIRATION):
+        return self.get_many(bucket_name, [object_name], expiration)[object_name]
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._urls),
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 3) if lookups else None,
+            }
+
+
+presigned_url_cache = PresignedUrlCache()
+
+
+def get_presign_stats() -> dict:
+    return presigned_url_cache.stats()
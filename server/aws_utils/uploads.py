@@ -0,0 +1,60 @@
+import io
+import os
+import asyncio
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from boto3.s3.transfer import TransferConfig
+from aws_utils.clients import get_s3_client, AWS_MAX_POOL_CONNECTIONS
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# uploads in flight across the process, more wait for a free thread
+S3_UPLOAD_CONCURRENCY = int(os.environ.get("S3_UPLOAD_CONCURRENCY", 8))
+# files from the threshold up are sent as a multipart upload, parts go out in parallel
+S3_MULTIPART_THRESHOLD = int(os.environ.get("S3_MULTIPART_THRESHOLD", 8 * 1024 * 1024))
+S3_MULTIPART_CHUNKSIZE = int(os.environ.get("S3_MULTIPART_CHUNKSIZE", 8 * 1024 * 1024))
+S3_MULTIPART_CONCURRENCY = int(os.environ.get("S3_MULTIPART_CONCURRENCY", 4))
+
+if S3_UPLOAD_CONCURRENCY * S3_MULTIPART_CONCURRENCY > AWS_MAX_POOL_CONNECTIONS:
+    logger.warning(f"S3 uploads can open {S3_UPLOAD_CONCURRENCY * S3_MULTIPART_CONCURRENCY} connections, above AWS_MAX_POOL_CONNECTIONS={AWS_MAX_POOL_CONNECTIONS}")
+
+TRANSFER_CONFIG = TransferConfig(
+    multipart_threshold=S3_MULTIPART_THRESHOLD,
+    multipart_chunksize=S3_MULTIPART_CHUNKSIZE,
+    max_concurrency=S3_MULTIPART_CONCURRENCY,
+)
+
+_upload_executor = ThreadPoolExecutor(max_workers=S3_UPLOAD_CONCURRENCY, thread_name_prefix="s3-upload")
+
+
+def upload_image(image_bytes: bytes, s3_bucket_name: str, image_key: str, content_type: str = "image/jpeg"):
+    """Blocking upload, use upload_image_async from async code."""
+    s3_client = get_s3_client()
+    s3_client.upload_fileobj(
+        io.BytesIO(image_bytes),
+        s3_bucket_name,
+        image_key,
+        ExtraArgs={"ACL": "public-read", "ContentType": content_type, "ContentDisposition": "inline"},
+        Config=TRANSFER_CONFIG,
+    )
+
+
+async def run_upload(upload, *args):
+    """Runs a blocking upload function on the upload threads."""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_upload_executor, upload, *args)
+
+
+async def upload_image_async(image_bytes: bytes, s3_bucket_name: str, image_key: str, content_type: str = "image/jpeg"):
+    await run_upload(upload_image, image_bytes, s3_bucket_name, image_key, content_type)
+
+
+async def gather_uploads(*uploads):
+    """Awaits the upload coroutines together. Every upload settles before the first failure,
+    if any, is raised, so a failed request does not leave uploads running behind it."""
+    results = await asyncio.gather(*uploads, return_exceptions=True)
+    for result in results:
+        if isinstance(result, BaseException):
+            raise result
+    return results
@@ -0,0 +1,57 @@
+import os
+import logging
+from urllib.parse import quote
+from aws_utils.clients import S3_REGION
+from aws_utils.presign import presigned_url_cache, PRESIGNED_URL_EXPIRATION
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# How read paths link to the images of each bucket:
+#   presigned  signed URL, needed for private buckets (the default)
+#   public     plain https://{bucket}.s3.{region}.amazonaws.com/{key}.jpg, for public-read objects
+#   https://…  base URL of a CDN in front of the bucket, e.g. https://images.drophouse.ai
+# e.g. S3_URL_STRATEGY=browse-image-v2=https://images.drophouse.ai,thumbnails-cart=public
+# Stable URLs can be cached by browsers and CDNs across sessions, presigned ones change every hour.
+URL_STRATEGY_PRESIGNED = "presigned"
+URL_STRATEGY_PUBLIC = "public"
+
+
+def parse_url_strategies(value: str) -> dict:
+    strategies = {}
+    for entry in value.split(","):
+        if not entry.strip():
+            continue
+        bucket_name, _, strategy = entry.partition("=")
+        strategy = strategy.strip().rstrip("/")
+        if strategy not in (URL_STRATEGY_PRESIGNED, URL_STRATEGY_PUBLIC) and not strategy.startswith(("https://", "http://")):
+            logger.warning(f"Ignoring unknown URL strategy '{strategy}' for bucket {bucket_name.strip()}")
+            continue
+        strategies[bucket_name.strip()] = strategy
+    return strategies
+
+
+S3_URL_STRATEGIES = parse_url_strategies(os.environ.get("S3_URL_STRATEGY", ""))
+
+
+def url_strategy(bucket_name: str) -> str:
+    return S3_URL_STRATEGIES.get(bucket_name, URL_STRATEGY_PRESIGNED)
+
+
+def _base_url(bucket_name: str, strategy: str) -> str:
+    if strategy == URL_STRATEGY_PUBLIC:
+        return f"https://{bucket_name}.s3.{S3_REGION}.amazonaws.com"
+    return strategy
+
+
+def image_urls(object_names, bucket_name: str) -> dict:
+    """URLs of many images of one bucket, as {object_name: url}, using the bucket's strategy."""
+    strategy = url_strategy(bucket_name)
+    if strategy == URL_STRATEGY_PRESIGNED:
+        return presigned_url_cache.get_many(bucket_name, object_names, PRESIGNED_URL_EXPIRATION)
+    base_url = _base_url(bucket_name, strategy)
+    return {object_name: f"{base_url}/{quote(object_name)}.jpg" for object_name in object_names}
+
+
+def image_url(object_name: str, bucket_name: str):
+    return image_urls([object_name], bucket_name)[object_name]
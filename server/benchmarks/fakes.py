@@ -0,0 +1,144 @@
+"""Stand-in image, chat, S3 and Mongo backends for offline load tests.
+
+They keep the shape of the real clients (ImageGenerator.generate_single_image,
+client.chat.completions.create(stream=True), upload_browse_image, motor
+collections) so the code under test runs unchanged, only without paying for
+Bedrock/OpenAI or needing AWS and Mongo credentials.
+"""
+import io
+import math
+import time
+import json
+import random
+import asyncio
+from datetime import datetime
+from types import SimpleNamespace
+from PIL import Image
+from ai_models.ImageGenerator import ImageGenerator
+from ai_models.scheduler import get_scheduler
+
+
+class LatencyDistribution:
+    """Log-normal latency given its median and p95, in seconds, scaled by `time_scale`."""
+
+    def __init__(self, median: float, p95: float, time_scale: float = 1.0):
+        self.median = median
+        self.sigma = math.log(p95 / median) / 1.645 if p95 > median else 0.0
+        self.time_scale = time_scale
+
+    def sample(self) -> float:
+        return random.lognormvariate(math.log(self.median), self.sigma) * self.time_scale
+
+
+_image_bytes = None
+
+
+def fake_image_bytes() -> bytes:
+    """A 512x512 PNG with enough detail that compressing it costs about as much as a real one."""
+    global _image_bytes
+    if _image_bytes is None:
+        size = (512, 512)
+        image = Image.merge("RGB", [Image.radial_gradient("L").resize(size), Image.effect_noise(size, 40), Image.linear_gradient("L").resize(size)])
+        buffered = io.BytesIO()
+        image.save(buffered, format="PNG")
+        _image_bytes = buffered.getvalue()
+    return _image_bytes
+
+
+class FakeImageGenerator(ImageGenerator):
+    name = "fake"
+    latency = LatencyDistribution(8, 15)
+    failure_rate = 0.0
+
+    async def generate_single_image(self, idx, prompt, callback, user_id, task_id):
+        start = datetime.now()
+        # same per-provider concurrency cap as the real generator
+        async with get_scheduler(self.name).slot():
+            await asyncio.sleep(self.latency.sample())
+        duration = datetime.now() - start
+        if random.random() < self.failure_rate:
+            await callback(user_id, task_id, idx, True, duration)
+            raise RuntimeError(f"{self.name} fake failure")
+        image_bytes = fake_image_bytes()
+        await callback(user_id, task_id, idx, False, duration, image_bytes, self.name)
+        return idx, image_bytes, self.name
+
+
+def fake_image_generator(name: str, latency: LatencyDistribution, failure_rate: float = 0.0) -> type:
+    """A FakeImageGenerator subclass standing in for provider `name` (e.g. 'titan')."""
+    return type(f"Fake{name.title().replace('-', '')}ImageGenerator", (FakeImageGenerator,), {
+        "name": name,
+        "latency": latency,
+        "failure_rate": failure_rate,
+    })
+
+
+class FakeChatCompletions:
+    def __init__(self, latency: LatencyDistribution, failure_rate: float, chunk_size: int = 8):
+        self.latency = latency
+        self.failure_rate = failure_rate
+        self.chunk_size = chunk_size
+
+    async def create(self, messages, stream=False, **kwargs):
+        prompt = messages[-1]["content"]
+        text = json.dumps({"Prompts": [
+            {"Prompt1": prompt},
+            {"Prompt2": f"{prompt}, vivid colors and fine detail"},
+            {"Prompt3": f"{prompt}, vivid colors and fine detail, soft natural light, wide angle, highly detailed digital art"},
+        ]})
+        total = self.latency.sample()
+        if random.random() < self.failure_rate:
+            text = text[:len(text) // 2]  # truncated JSON, same as a bad completion
+        if not stream:
+            await asyncio.sleep(total)
+            return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content=text))])
+        return self._stream(text, total)
+
+    async def _stream(self, text: str, total: float):
+        chunks = [text[i:i + self.chunk_size] for i in range(0, len(text), self.chunk_size)]
+        await asyncio.sleep(total * 0.3)  # time to first token
+        for chunk in chunks:
+            await asyncio.sleep(total * 0.7 / len(chunks))
+            yield SimpleNamespace(choices=[SimpleNamespace(delta=SimpleNamespace(content=chunk))])
+
+
+class FakeChatClient:
+    """Replaces the AsyncOpenAI client used for prompt enhancement."""
+
+    def __init__(self, latency: LatencyDistribution, failure_rate: float = 0.0):
+        self.chat = SimpleNamespace(completions=FakeChatCompletions(latency, failure_rate))
+
+
+def fake_upload(latency: LatencyDistribution):
+    """Blocking stand-in for upload_browse_image, it runs in an executor like the real one."""
+    def upload_browse_image(image_bytes: bytes, img_id: str, rendition=None):
+        time.sleep(latency.sample())
+    return upload_browse_image
+
+
+class FakeCollection:
+    def __init__(self, database):
+        self.database = database
+
+    async def _ok(self, documents=(), *args, **kwargs):
+        self.database.writes += 1
+        inserted_ids = list(range(len(documents))) if isinstance(documents, list) else [1]
+        return SimpleNamespace(inserted_id=1, inserted_ids=inserted_ids, modified_count=1, matched_count=1)
+
+    insert_one = insert_many = update_one = update_many = delete_one = _ok
+
+    async def find_one(self, *args, **kwargs):
+        return None
+
+
+class FakeDatabase:
+    """Accepts any collection and write, counting the writes."""
+
+    def __init__(self):
+        self.writes = 0
+
+    def __getattr__(self, name):
+        return FakeCollection(self)
+
+    def __getitem__(self, name):
+        return FakeCollection(self)
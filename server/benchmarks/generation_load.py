@@ -0,0 +1,226 @@
+"""End-to-end load benchmark for /ask_gpt -> /get_image with fake providers.
+
+Drives N concurrent simulated users through the full generation flow against a
+local Redis, in process through the ASGI app, with Bedrock, OpenAI, S3 and Mongo
+replaced by the stand-ins in benchmarks/fakes.py. Run from the server directory:
+
+    python -m benchmarks.generation_load --users 50 --sessions 3 --time-scale 0.2
+
+The IMAGE_* settings (IMAGE_FALLBACK_MODE, IMAGE_DELIVERY_MODE, ...) are read from
+the environment as usual, so modes can be compared run against run.
+Point --redis-url at a scratch Redis, task keys are left to expire there.
+"""
+import os
+import sys
+import json
+import time
+import uuid
+import random
+import asyncio
+import argparse
+import logging
+
+os.environ.setdefault("OPENAI_KEY", "benchmark")  # the real clients are built at import but never called
+# presigning is local, dummy credentials keep its cost in the measurement without reaching AWS
+os.environ.setdefault("AWS_ACCESS_KEY_ID", "benchmark")
+os.environ.setdefault("AWS_SECRET_ACCESS_KEY", "benchmark")
+os.environ.setdefault("RECORD_ANALYSIS", "1")  # analysis goes to the fake database
+
+
+def percentile(values, percentile):
+    if not values:
+        return None
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * percentile))]
+
+
+def summarize(values):
+    return {
+        "count": len(values),
+        "p50": round(percentile(values, 0.5), 3) if values else None,
+        "p95": round(percentile(values, 0.95), 3) if values else None,
+        "max": round(max(values), 3) if values else None,
+    }
+
+
+class LoopLagMonitor:
+    """Measures how late the event loop wakes up a task that sleeps `interval` seconds."""
+
+    def __init__(self, interval: float = 0.05):
+        self.interval = interval
+        self.lags = []
+        self._task = None
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            start = loop.time()
+            await asyncio.sleep(self.interval)
+            self.lags.append(loop.time() - start - self.interval)
+
+    def start(self):
+        self._task = asyncio.create_task(self._run())
+
+    def stop(self):
+        self._task.cancel()
+
+
+async def run_session(client, user_id, prompt, images, results):
+    headers = {"X-Benchmark-User": user_id}
+    started = time.monotonic()
+    response = await client.post("/ask_gpt", json={"prompt": prompt}, headers=headers)
+    results["ask_gpt"].append(time.monotonic() - started)
+    if response.status_code != 200:
+        results["errors"].append(f"ask_gpt {response.status_code}")
+        return
+    task_id = response.json()["response"]["task_id"]
+
+    first_image = None
+
+    async def get_image(idx):
+        nonlocal first_image
+        requested = time.monotonic()
+        response = await client.post("/get_image", json={"idx": idx, "prompt": prompt, "task_id": task_id}, headers=headers)
+        finished = time.monotonic()
+        results["get_image"].append(finished - requested)
+        if response.status_code != 200:
+            results["errors"].append(f"get_image {response.status_code}")
+            return
+        results["response_bytes"].append(len(response.content))
+        if first_image is None or finished < first_image:
+            first_image = finished
+
+    # serving an image records the analysis and clears the task, so later indexes of the
+    # same task are only meaningful while they race the first one
+    await asyncio.gather(*(get_image(idx) for idx in range(images)))
+    if first_image is not None:
+        results["time_to_first_image"].append(first_image - started)
+
+
+async def simulated_user(client, sessions, images, results):
+    user_id = f"benchmark-{uuid.uuid4()}"
+    for _ in range(sessions):
+        prompt = f"a {random.choice(['red', 'blue', 'golden', 'misty'])} {random.choice(['fox', 'city', 'forest', 'robot'])} {uuid.uuid4().hex[:6]}"
+        await run_session(client, user_id, prompt, images, results)
+
+
+def build_app(args):
+    """The imagen router with fake providers, auth and databases, returns (app, redis module)."""
+    from fastapi import FastAPI, Header
+    import db
+    import redis as redis_module
+    import routers.imagen as imagen
+    import utils.image_generation as image_generation
+    import utils.image_store as image_store
+    import utils.record_images as record_images
+    from verification import verify_id_token
+    from benchmarks.fakes import LatencyDistribution, FakeChatClient, FakeDatabase, fake_image_generator, fake_upload
+
+    def latency(median, p95):
+        return LatencyDistribution(median, p95, args.time_scale)
+
+    image_generation.IMAGE_GENERATORS = {
+        "titan": fake_image_generator("titan", latency(args.titan_median, args.titan_p95), args.titan_failure_rate),
+        "openai": fake_image_generator("openai", latency(args.openai_median, args.openai_p95), args.openai_failure_rate),
+        "stable-diffusion": fake_image_generator("stable-diffusion", latency(args.sd_median, args.sd_p95), args.sd_failure_rate),
+    }
+    imagen.client = FakeChatClient(latency(args.chat_median, args.chat_p95), args.chat_failure_rate)
+    upload = fake_upload(latency(args.upload_median, args.upload_p95))
+    record_images.upload_browse_image = upload
+    image_store.upload_browse_image = upload
+    db.db = FakeDatabase()
+
+    async def benchmark_user(x_benchmark_user: str = Header(...)):
+        return x_benchmark_user
+
+    app = FastAPI()
+    app.include_router(imagen.imagen_router)
+    app.dependency_overrides[verify_id_token] = benchmark_user
+    return app, redis_module
+
+
+async def main(args):
+    import httpx
+    os.environ["REDIS_URL"] = args.redis_url
+    app, redis_module = build_app(args)
+    redis_module.REDIS_URL = args.redis_url
+    import db
+    from utils.task_events import start_task_event_listener, stop_task_event_listener
+    from utils.analysis_sink import start_analysis_sink, stop_analysis_sink
+    from utils.image_pipeline import start_image_pipeline, stop_image_pipeline, get_pipeline_stats
+
+    await start_image_pipeline()
+    await redis_module.connect_to_redis()
+    await start_task_event_listener()
+    await start_analysis_sink()
+    redis = redis_module.get_redis_database()
+    commands_before = int((await redis.info("stats"))["stats"]["total_commands_processed"])
+
+    results = {"ask_gpt": [], "get_image": [], "time_to_first_image": [], "response_bytes": [], "errors": []}
+    monitor = LoopLagMonitor()
+    monitor.start()
+    started = time.monotonic()
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://benchmark", timeout=None) as client:
+        await asyncio.gather(*(simulated_user(client, args.sessions, args.images, results) for _ in range(args.users)))
+    elapsed = time.monotonic() - started
+    monitor.stop()
+
+    commands_after = int((await redis.info("stats"))["stats"]["total_commands_processed"])
+    await stop_analysis_sink()
+    sessions = args.users * args.sessions
+    report = {
+        "users": args.users,
+        "sessions": sessions,
+        "elapsed_seconds": round(elapsed, 2),
+        "time_scale": args.time_scale,
+        "time_to_first_image": summarize(results["time_to_first_image"]),
+        "ask_gpt_latency": summarize(results["ask_gpt"]),
+        "get_image_latency": summarize(results["get_image"]),
+        "avg_get_image_response_bytes": round(sum(results["response_bytes"]) / len(results["response_bytes"])) if results["response_bytes"] else None,
+        # counted by the server, so it includes pub/sub and the two INFO calls
+        "redis_commands_per_session": round((commands_after - commands_before) / sessions, 1),
+        "mongo_writes_per_session": round(db.db.writes / sessions, 2),
+        "event_loop_lag": summarize(monitor.lags),
+        "image_pipeline": get_pipeline_stats(),
+        "errors": len(results["errors"]),
+        "error_kinds": sorted(set(results["errors"])),
+    }
+    print(json.dumps(report, indent=2))
+
+    await stop_task_event_listener()
+    await redis_module.close_redis_connection()
+    await stop_image_pipeline()
+
+
+def parse_args(argv):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--users", type=int, default=20, help="concurrent simulated users")
+    parser.add_argument("--sessions", type=int, default=3, help="generation sessions per user, run one after another")
+    parser.add_argument("--images", type=int, default=1, choices=(1, 2, 3), help="/get_image calls per session, sent at once")
+    parser.add_argument("--redis-url", default=os.environ.get("BENCHMARK_REDIS_URL", "redis://localhost"))
+    parser.add_argument("--time-scale", type=float, default=1.0, help="multiplies every fake latency, e.g. 0.1 for a quick run")
+    # seconds, median and p95 of a log-normal distribution; defaults roughly follow production
+    parser.add_argument("--titan-median", type=float, default=7.0)
+    parser.add_argument("--titan-p95", type=float, default=14.0)
+    parser.add_argument("--titan-failure-rate", type=float, default=0.02)
+    parser.add_argument("--openai-median", type=float, default=9.0)
+    parser.add_argument("--openai-p95", type=float, default=18.0)
+    parser.add_argument("--openai-failure-rate", type=float, default=0.02)
+    parser.add_argument("--sd-median", type=float, default=11.0)
+    parser.add_argument("--sd-p95", type=float, default=20.0)
+    parser.add_argument("--sd-failure-rate", type=float, default=0.02)
+    parser.add_argument("--chat-median", type=float, default=2.0)
+    parser.add_argument("--chat-p95", type=float, default=4.0)
+    parser.add_argument("--chat-failure-rate", type=float, default=0.01)
+    parser.add_argument("--upload-median", type=float, default=0.15)
+    parser.add_argument("--upload-p95", type=float, default=0.4)
+    parser.add_argument("--log-level", default="WARNING")
+    return parser.parse_args(argv)
+
+
+if __name__ == "__main__":
+    args = parse_args(sys.argv[1:])
+    logging.basicConfig(level=args.log_level)
+    logging.getLogger().setLevel(args.log_level)
+    asyncio.run(main(args))
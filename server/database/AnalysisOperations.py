@@ -1,4 +1,6 @@
 import logging
+from typing import List
+from pymongo.errors import BulkWriteError
 from database.BASE import BaseDatabaseOperation
 from models import AnalysisModel
 
@@ -16,6 +18,18 @@ class AnalysisOperations(BaseDatabaseOperation):
             logger.critical(f"Error adding to analysis: {e}")
             return False
 
+    async def create_many(self, analysis_data: List[AnalysisModel]) -> bool:
+        try:
+            result = await self.db.analysis.insert_many([analysis.model_dump() for analysis in analysis_data], ordered=False)
+            return len(result.inserted_ids) == len(analysis_data)
+        except BulkWriteError as e:
+            # some records were written, retrying the batch would duplicate them
+            logger.critical(f"Error adding analysis records, {e.details.get('nInserted')} of {len(analysis_data)} written: {e}")
+            return True
+        except Exception as e:
+            logger.critical(f"Error adding {len(analysis_data)} records to analysis: {e}")
+            return False
+
     async def update(self, task_id, data):
         # Implementation for updating analysis if needed
         pass
@@ -10,7 +10,7 @@ logger = logging.getLogger(__name__)
 class AuthOperations(BaseDatabaseOperation):
     async def update(self, user_id: str, user_data: UserInitModel) -> dict:
         # Check if the user exists
-        user_exists = await self.db.users.find_one({"user_id": user_id})
+        user_exists = await self.db.users.find_one({"user_id": user_id}, {"_id": 1})
         if user_exists:
             return 1
         else:
@@ -1,4 +1,6 @@
+from typing import Optional
 from database.BASE import BaseDatabaseOperation
+from database.user_collections import BROWSED_IMAGES, DEFAULT_PAGE_SIZE, find_page
 from models import BrowsedImageDataModel
 import logging
 
@@ -9,11 +11,10 @@ logger = logging.getLogger(__name__)
 class BrowsedImageOperations(BaseDatabaseOperation):
     async def create(self, user_id: str, image_data: BrowsedImageDataModel) -> bool:
         try:
-            result = await self.db.users.update_one(
-                {"user_id": user_id},
-                {"$push": {"browsed_images": image_data.model_dump()}},
+            result = await self.db[BROWSED_IMAGES].insert_one(
+                {"user_id": user_id, **image_data.model_dump()}
             )
-            return result.modified_count > 0
+            return result.inserted_id is not None
         except Exception as e:
             logger.error(f"Error adding browsed image: {e}")
             return False
@@ -24,7 +25,12 @@ class BrowsedImageOperations(BaseDatabaseOperation):
     async def remove(self, user_id):
         pass
 
-    async def get(self, user_id):
-        pass
+    async def get(self, user_id, cursor: Optional[str] = None, limit: int = DEFAULT_PAGE_SIZE):
+        """Newest browsed images first, returns (images, next_cursor)."""
+        try:
+            return await find_page(self.db[BROWSED_IMAGES], user_id, cursor, limit)
+        except Exception as e:
+            logger.error(f"Error retrieving browsed images: {e}")
+            return [], None
 
 
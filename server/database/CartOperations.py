@@ -1,5 +1,7 @@
+import asyncio
 import logging
 from database.BASE import BaseDatabaseOperation
+from database.user_collections import CART, LIKED_IMAGES, find_all
 from models import ItemModel
 
 logging.basicConfig(level=logging.INFO)
@@ -10,20 +12,16 @@ class CartOperations(BaseDatabaseOperation):
     async def create(self, user_id: str, product_info: ItemModel) -> bool:
         try:
             product_data = product_info.model_dump()
-            result = await self.db.users.update_one(
-                {"user_id": user_id}, {"$push": {"cart": product_data}}
-            )
-            return result.modified_count > 0
+            result = await self.db[CART].insert_one({"user_id": user_id, **product_data})
+            return result.inserted_id is not None
         except Exception as e:
             logger.critical(f"Error adding to cart: {e}")
             return False
 
     async def remove(self, user_id: str, img_id: str) -> bool:
         try:
-            result = await self.db.users.update_one(
-                {"user_id": user_id}, {"$pull": {"cart": {"img_id": img_id}}}
-            )
-            return result.modified_count > 0
+            result = await self.db[CART].delete_one({"user_id": user_id, "img_id": img_id})
+            return result.deleted_count > 0
         except Exception as e:
             logger.critical(f"Error removing image: {e}")
             return False
@@ -34,11 +32,7 @@ class CartOperations(BaseDatabaseOperation):
 
     async def get(self, user_id: str) -> list:
         try:
-            user = await self.db.users.find_one({"user_id": user_id}, {"cart": 1})
-            if user and "cart" in user:
-                return user["cart"]
-            else:
-                return []
+            return await find_all(self.db[CART], user_id)
         except Exception as e:
             logger.error(f"Error retrieving cart: {e}")
             return []
@@ -46,34 +40,18 @@ class CartOperations(BaseDatabaseOperation):
 
     async def get_cart_and_fav_number(self, user_id: str) -> dict:
         try:
-            user = await self.db.users.find_one({"user_id": user_id}, {"cart": 1, "liked_images": 1})
-            count = {}
-            if user and "cart" in user:
-                cart = user["cart"]
-                count['cart_number'] = len(cart)
-            else:
-                count['cart_number'] = 0
-
-            if user and "liked_images" in user:
-                liked = user["liked_images"]
-                count['liked_number'] = len(liked)
-            else:
-                count['liked_number'] = 0
-
-            return count
+            cart_number, liked_number = await asyncio.gather(
+                self.db[CART].count_documents({"user_id": user_id}),
+                self.db[LIKED_IMAGES].count_documents({"user_id": user_id}),
+            )
+            return {"cart_number": cart_number, "liked_number": liked_number}
         except Exception as e:
             logger.error(f"Error retrieving cart count: {e}")
             return 0
 
     async def get_cart_number(self, user_id: str) -> int:
         try:
-            user = await self.db.users.find_one({"user_id": user_id}, {"cart": 1})
-            if user and "cart" in user:
-                cart = user["cart"]
-                count = sum(1 for item in cart)
-                return count
-            else:
-                return 0
+            return await self.db[CART].count_documents({"user_id": user_id})
         except Exception as e:
             logger.error(f"Error retrieving cart count: {e}")
             return 0
@@ -81,10 +59,10 @@ class CartOperations(BaseDatabaseOperation):
 
     async def duplicate_images(self, user_id: str, img_id: str) -> bool:
         try:
-            exists = await self.db.users.find_one(
+            exists = await self.db[CART].find_one(
                 {
                     "user_id": user_id,
-                    "cart.img_id": img_id
+                    "img_id": img_id
                 },
                 {"_id": 1}
             )
@@ -97,7 +75,7 @@ class CartOperations(BaseDatabaseOperation):
     async def checkUserExist(self, user_id):
         try:
             user = await self.db.users.find_one(
-                {"user_id": user_id},
+                {"user_id": user_id}, {"_id": 1}
             )
             if user:
                 return True
@@ -1,5 +1,7 @@
 import logging
+from typing import Optional
 from database.BASE import BaseDatabaseOperation
+from database.user_collections import LIKED_IMAGES, DEFAULT_PAGE_SIZE, find_all, find_page
 from models import ItemModel
 
 logging.basicConfig(level=logging.INFO)
@@ -10,10 +12,8 @@ class LikedImageOperations(BaseDatabaseOperation):
     async def create(self, user_id: str, product_info) -> bool:
         try:
             product_data = product_info.model_dump()
-            result = await self.db.users.update_one(
-                {"user_id": user_id}, {"$push": {"liked_images": product_data}}
-            )
-            return result.modified_count > 0
+            result = await self.db[LIKED_IMAGES].insert_one({"user_id": user_id, **product_data})
+            return result.inserted_id is not None
         except Exception as e:
             logger.critical(f"Error saving image: {e}")
             return False
@@ -21,10 +21,8 @@ class LikedImageOperations(BaseDatabaseOperation):
     async def remove(self, user_id: str, product_info: ItemModel) -> bool:
         try:
             img_id = product_info.img_id
-            result = await self.db.users.update_one(
-                {"user_id": user_id}, {"$pull": {"liked_images": {"img_id": img_id}}}
-            )
-            return result.modified_count > 0
+            result = await self.db[LIKED_IMAGES].delete_one({"user_id": user_id, "img_id": img_id})
+            return result.deleted_count > 0
         except Exception as e:
             logger.critical(f"Error removing image: {e}")
             return False
@@ -34,27 +32,24 @@ class LikedImageOperations(BaseDatabaseOperation):
 
     async def get(self, user_id: str) -> list:
         try:
-            user = await self.db.users.find_one(
-                {"user_id": user_id}, {"liked_images": 1}
-            )
-            if user and "liked_images" in user:
-                return user["liked_images"]
-            else:
-                return []
+            return await find_all(self.db[LIKED_IMAGES], user_id)
         except Exception as e:
             logger.error(f"Error retrieving liked images: {e}")
             return []
+
+    async def get_page(self, user_id: str, cursor: Optional[str] = None, limit: int = DEFAULT_PAGE_SIZE):
+        """Newest liked images first, returns (images, next_cursor)."""
+        return await find_page(self.db[LIKED_IMAGES], user_id, cursor, limit)
         
     async def duplicate_images(self, user_id: str, img_id: str) -> bool:
         try:
             img_id_prefix = img_id.split("_")[0]
-            exists = await self.db.users.find_one(
+            exists = await self.db[LIKED_IMAGES].find_one(
                 {
                     "user_id": user_id,
-                    "liked_images": {
-                        "$elemMatch": {"img_id": {"$regex": f"^{img_id_prefix}(_|$)"}}
-                    },
-                }
+                    "img_id": {"$regex": f"^{img_id_prefix}(_|$)"},
+                },
+                {"_id": 1}
             )
             return bool(exists)
         except Exception as e:
@@ -64,7 +59,7 @@ class LikedImageOperations(BaseDatabaseOperation):
     async def checkUserExist(self, user_id):
         try:
             user = await self.db.users.find_one(
-                {"user_id": user_id},
+                {"user_id": user_id}, {"_id": 1}
             )
             if user:
                 return True
@@ -2,7 +2,7 @@ from datetime import datetime, timedelta
 import logging
 from database.BASE import BaseDatabaseOperation
 from models.OrderItemModel import OrderItem
-from aws_utils import generate_presigned_url
+from aws_utils import image_urls
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -51,12 +51,10 @@ class OrderOperations(BaseDatabaseOperation):
     async def get(self, user_id: str) -> list:
         try:
             orders = await self.db.orders.find({"user_id": user_id}, {'_id':0}).to_list(length=None)
-            for idx in range(len(orders)):
-                order = orders[idx]
-                for item in order["item"]:
-                    img_id = item["img_id"]
-                    thumbnail_img_id = "t_" + img_id
-                    item["thumbnail"] = generate_presigned_url(thumbnail_img_id, "thumbnails-cart")
+            items = [item for order in orders for item in order["item"]]
+            thumbnails = image_urls(["t_" + item["img_id"] for item in items], "thumbnails-cart")
+            for item in items:
+                item["thumbnail"] = thumbnails["t_" + item["img_id"]]
             return orders
         except Exception as e:
             logger.error(f"Error retrieving orders: {e}")
@@ -1,6 +1,7 @@
 import logging
 from database.BASE import BaseDatabaseOperation
 from models import PricesModel
+from utils.price_catalog import price_catalog
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -11,6 +12,7 @@ class PricesOperations(BaseDatabaseOperation):
 		try:
 			price_data = price_info.model_dump()
 			result = await self.db.Prices.insert_one(price_data)
+			await price_catalog.invalidate()
 			return result.modified_count > 0
 		except Exception as e:
 			logger.critical(f"Error adding price to prices: {e}")
@@ -21,6 +23,7 @@ class PricesOperations(BaseDatabaseOperation):
 			result = await self.db.Prices.delete_one(
 				{"apparel":apparel}
 			)
+			await price_catalog.invalidate()
 			return result.modified_count > 0
 		except Exception as e:
 			logger.critical(f"Error removing price in prices: {e}")
@@ -30,12 +33,15 @@ class PricesOperations(BaseDatabaseOperation):
 		# Implementation for updating if needed
 		pass
 
+	async def load(self) -> dict:
+		prices_data = await self.db.Prices.find({}, {'_id':0}).to_list(length=None)
+		return {price['apparel']: price['price'] for price in prices_data}
+
 	async def get(self):
 		try:
-			prices_data = await self.db.Prices.find({}, {'_id':0}).to_list(length=None)
-			if prices_data:
-				prices_dict = {price['apparel']: price['price'] for price in prices_data}
-				return prices_dict
+			prices_dict = await price_catalog.get(self.load)
+			if prices_dict:
+				return dict(prices_dict)  # a copy, callers may edit it
 			else:
 				return []
 		except Exception as e:
@@ -2,6 +2,7 @@ import logging
 import pgeocode
 from database.BASE import BaseDatabaseOperation
 from fastapi.responses import JSONResponse
+from database.user_collections import SHIPPING_INFO, find_all
 from models import ShippingModel
 
 # Set up the logger
@@ -13,10 +14,8 @@ class ShippingOperations(BaseDatabaseOperation):
     async def create(self, user_id: str, shipping_info: ShippingModel) -> bool:
         try:
             shipping_data = shipping_info.model_dump()
-            result = await self.db.users.update_one(
-                {"user_id": user_id}, {"$push": {"shipping_info": shipping_data}}
-            )
-            return result.modified_count > 0
+            result = await self.db[SHIPPING_INFO].insert_one({"user_id": user_id, **shipping_data})
+            return result.inserted_id is not None
         except Exception as e:
             logger.critical(f"Error saving shipping info: {e}")
             return False
@@ -43,30 +42,19 @@ class ShippingOperations(BaseDatabaseOperation):
             if shipping_info.addressType not in ["primary", "secondary"]:
                 raise ValueError("Invalid address type")
             
-            result = await self.db.users.update_one(
+            # one address per type, the (user_id, addressType) index is unique
+            result = await self.db[SHIPPING_INFO].update_one(
                 {
                     "user_id": user_id,
-                    "shipping_info.addressType": shipping_info.addressType,
+                    "addressType": shipping_info.addressType,
                 },
-                {"$set": {"shipping_info.$": shipping_data}},
+                {"$set": shipping_data},
+                upsert=True,
             )
 
-            if result.modified_count == 0:
-                existing_count = await self.db.users.count_documents({
-                    "user_id": user_id,
-                    "shipping_info.addressType": shipping_info.addressType
-                })
-                if existing_count >= 2:
-                    raise ValueError(f"Cannot add more than one {shipping_info.addressType} address")
-                
-                result = await self.db.users.update_one(
-                    {"user_id": user_id},
-                    {"$push": {"shipping_info": shipping_data}}
-                )
-
             return JSONResponse(
                 status_code=200,
-                content= {"detail": result.modified_count > 0}
+                content= {"detail": result.modified_count > 0 or result.upserted_id is not None}
             )
         except Exception as e:
             logger.critical(f"Error saving shipping info: {e}")
@@ -77,28 +65,17 @@ class ShippingOperations(BaseDatabaseOperation):
 
     async def remove(self, user_id: str, shipping_info: ShippingModel) -> bool:
         try:
-            result = await self.db.users.update_one(
-                {"user_id": user_id},
-                {
-                    "$pull": {
-                        "shipping_info": {"addressType": shipping_info.AddressType}
-                    }
-                },
+            result = await self.db[SHIPPING_INFO].delete_one(
+                {"user_id": user_id, "addressType": shipping_info.addressType}
             )
-            return result.modified_count > 0
+            return result.deleted_count > 0
         except Exception as e:
             logger.error(f"Error removing shipping info: {e}")
         return False
 
     async def get(self, user_id):
         try:
-            user = await self.db.users.find_one(
-                {"user_id": user_id}, {"shipping_info": 1}
-            )
-            if user and "shipping_info" in user:
-                return user["shipping_info"]
-            else:
-                return []
+            return await find_all(self.db[SHIPPING_INFO], user_id)
         except Exception as e:
             logger.error(f"Error retrieving shipping info: {e}")
             return []
@@ -147,7 +124,7 @@ class ShippingOperations(BaseDatabaseOperation):
     async def checkUserExist(self, user_id):
         try:
             user = await self.db.users.find_one(
-                {"user_id": user_id},
+                {"user_id": user_id}, {"_id": 1}
             )
             if user:
                 return True
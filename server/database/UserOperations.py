@@ -5,7 +5,8 @@ from database.SaltOperations import SaltOperations
 from fastapi import Depends
 from db import get_db_ops
 from models.OrderItemModel import OrderItem
-from aws_utils import generate_presigned_url
+from aws_utils import image_urls
+from database.user_collections import WITHOUT_USER_ARRAYS, attach_user_arrays
 from models.UserInitModel import UserInitModel
 from models.EncryptModel import EncryptModel
 import uuid
@@ -18,8 +19,9 @@ class UserOperations(BaseDatabaseOperation):
         try:
             if encrypt_model and encrypt_model.salt_id and encrypt_model.encrypted_data:
                 user_id = await salt_db_ops.decrypt_and_remove(encrypt_model, remove_key=False)
-                user_data = await self.db.users.find_one({"user_id": user_id}, {'_id': 0})
+                user_data = await self.db.users.find_one({"user_id": user_id}, {'_id': 0, **WITHOUT_USER_ARRAYS})
                 if user_data:
+                    await attach_user_arrays(self.db, [user_data])
                     user_data['user_id'] = encrypt_model.encrypted_data
                     user_data['key_id'] = encrypt_model.salt_id
                     return user_data
@@ -57,19 +59,20 @@ class UserOperations(BaseDatabaseOperation):
 
             # Prepare a list of user_ids from the orders to fetch user data in one go
             user_ids = {order['user_id'] for order in orders}
-            users = await self.db.users.find({"user_id": {"$in": list(user_ids)}}).to_list(length=None)
+            users = await self.db.users.find({"user_id": {"$in": list(user_ids)}}, WITHOUT_USER_ARRAYS).to_list(length=None)
+            await attach_user_arrays(self.db, users)
             user_dict = {user['user_id']: user for user in users}  # Create a dictionary of users by user_id
 
             # Enrich each order with user data and signed URLs for images
+            items = [item for order in orders for item in order.get("item", [])]
+            thumbnails = image_urls(["t_" + item["img_id"] for item in items], "thumbnails-cart")
+            images = image_urls([item["img_id"] for item in items], "browse-image-v2")
             for order in orders:
                 user_data = user_dict.get(order['user_id'], {})
                 order['user_info'] = user_data  # Add user info to each order
-                if "item" in order:  # Assuming each order has an 'items' key
-                    for item in order["item"]:
-                        img_id = item["img_id"]
-                        thumbnail_img_id = "t_" + img_id
-                        item["thumbnail"] = generate_presigned_url(thumbnail_img_id, "thumbnails-cart")
-                        item["img_url"] = generate_presigned_url(img_id, "browse-image-v2")
+            for item in items:
+                item["thumbnail"] = thumbnails["t_" + item["img_id"]]
+                item["img_url"] = images[item["img_id"]]
             
             return orders
         except Exception as e:
@@ -78,8 +81,9 @@ class UserOperations(BaseDatabaseOperation):
 
     async def get_userByEmail(self, user_email) -> list:
         try:
-            user_data = await self.db.users.find_one({'email':user_email}, {'_id':0})
+            user_data = await self.db.users.find_one({'email':user_email}, {'_id':0, **WITHOUT_USER_ARRAYS})
             if user_data:
+                await attach_user_arrays(self.db, [user_data])
                 return user_data
             else:
                 return []
@@ -0,0 +1,90 @@
+import asyncio
+import logging
+from typing import Optional
+from bson import ObjectId
+from bson.errors import InvalidId
+from pymongo import ASCENDING, DESCENDING
+from db import get_database
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Per-user lists that used to be arrays inside the users document, now one document per
+# entry keyed by user_id. The collections are named after the old fields.
+CART = "cart"
+LIKED_IMAGES = "liked_images"
+BROWSED_IMAGES = "browsed_images"
+SHIPPING_INFO = "shipping_info"
+USER_ARRAY_FIELDS = (CART, LIKED_IMAGES, BROWSED_IMAGES, SHIPPING_INFO)
+# the field that identifies an entry within a user's list
+ENTRY_KEYS = {
+    CART: "img_id",
+    LIKED_IMAGES: "img_id",
+    BROWSED_IMAGES: "img_id",
+    SHIPPING_INFO: "addressType",
+}
+
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 200
+# what callers see of an entry, the storage fields are left out
+ENTRY_PROJECTION = {"_id": 0, "user_id": 0}
+# reading a user without its (pre-migration) arrays
+WITHOUT_USER_ARRAYS = {field: 0 for field in USER_ARRAY_FIELDS}
+
+
+async def ensure_indexes(db=None):
+    """(user_id, _id) serves listing and cursor pagination, (user_id, entry key) lookups
+    and duplicate checks. create_index is a no-op for indexes that already exist."""
+    db = db if db is not None else get_database()
+    for name, entry_key in ENTRY_KEYS.items():
+        collection = db[name]
+        await collection.create_index([("user_id", ASCENDING), ("_id", ASCENDING)])
+        await collection.create_index([("user_id", ASCENDING), (entry_key, ASCENDING)], unique=True)
+    logger.info(f"Indexes ensured for {', '.join(ENTRY_KEYS)}")
+
+
+async def find_all(collection, user_id: str) -> list:
+    """Every entry of the user, oldest first, the order the arrays had."""
+    return await collection.find({"user_id": user_id}, ENTRY_PROJECTION).sort("_id", ASCENDING).to_list(length=None)
+
+
+async def find_page(collection, user_id: str, cursor: Optional[str] = None, limit: int = DEFAULT_PAGE_SIZE):
+    """Newest entries first, `limit` at a time. Returns (entries, next_cursor), pass next_cursor
+    back for the following page, it is None on the last one."""
+    limit = max(1, min(limit, MAX_PAGE_SIZE))
+    query = {"user_id": user_id}
+    if cursor:
+        try:
+            query["_id"] = {"$lt": ObjectId(cursor)}
+        except InvalidId:
+            raise ValueError(f"Invalid cursor: {cursor}")
+    entries = await collection.find(query, {"user_id": 0}).sort("_id", DESCENDING).limit(limit + 1).to_list(length=limit + 1)
+    next_cursor = str(entries[limit - 1]["_id"]) if len(entries) > limit else None
+    entries = entries[:limit]
+    for entry in entries:
+        del entry["_id"]
+    return entries, next_cursor
+
+
+async def find_user_arrays(db, user_ids) -> dict:
+    """{user_id: {field: entries}} with every list of the given users, oldest first."""
+    user_ids = list(user_ids)
+    arrays = {user_id: {field: [] for field in USER_ARRAY_FIELDS} for user_id in user_ids}
+    results = await asyncio.gather(*(
+        db[field].find({"user_id": {"$in": user_ids}}, {"_id": 0}).sort("_id", ASCENDING).to_list(length=None)
+        for field in USER_ARRAY_FIELDS
+    ))
+    for field, entries in zip(USER_ARRAY_FIELDS, results):
+        for entry in entries:
+            arrays[entry.pop("user_id")][field].append(entry)
+    return arrays
+
+
+async def attach_user_arrays(db, users: list):
+    """Puts the lists back on user documents, read from the collections, so user responses keep
+    their old shape. Deprecated, clients should use the cart, favorites and shipping endpoints;
+    to be removed in the next release."""
+    users = [user for user in users if user.get("user_id")]
+    arrays = await find_user_arrays(db, {user["user_id"] for user in users})
+    for user in users:
+        user.update(arrays[user["user_id"]])
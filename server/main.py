@@ -19,7 +19,8 @@ from routers import (
     email_router,
     static_router,
     prices_router,
-    org_router
+    org_router,
+    stats_router
 )
 import asyncio
 import uvicorn
@@ -27,7 +28,13 @@ import logging
 import signal
 import sys
 from db import connect_to_mongo, close_mongo_connection
+from database.user_collections import ensure_indexes
 from redis import connect_to_redis, close_redis_connection
+from utils.task_events import start_task_event_listener, stop_task_event_listener
+from utils.analysis_sink import start_analysis_sink, stop_analysis_sink
+from utils.image_pipeline import start_image_pipeline, stop_image_pipeline
+from utils.price_catalog import start_price_watch, stop_price_watch
+from utils.runtime_stats import start_stats_log, stop_stats_log
 import firebase_admin
 from firebase_admin import credentials
 from starlette.exceptions import HTTPException as StarletteHTTPException
@@ -96,10 +103,21 @@ async def http_exception_handler(request, exc):
 def root():
     return {"message": "Welcome to the New Order!!!"}
 
+app.add_event_handler("startup", start_image_pipeline)  # first, forks the image workers
 app.add_event_handler("startup", connect_to_mongo)
+app.add_event_handler("startup", ensure_indexes)
 app.add_event_handler("startup", connect_to_redis)
+app.add_event_handler("startup", start_price_watch)
+app.add_event_handler("startup", start_task_event_listener)
+app.add_event_handler("startup", start_analysis_sink)
+app.add_event_handler("startup", start_stats_log)
+app.add_event_handler("shutdown", stop_stats_log)
+app.add_event_handler("shutdown", stop_analysis_sink)  # flushes buffered analysis, before mongo closes
+app.add_event_handler("shutdown", stop_price_watch)
 app.add_event_handler("shutdown", close_mongo_connection)
+app.add_event_handler("shutdown", stop_task_event_listener)
 app.add_event_handler("shutdown", close_redis_connection)
+app.add_event_handler("shutdown", stop_image_pipeline)
 app.include_router(auth_router)
 app.include_router(imagen_router)
 app.include_router(favorite_router)
@@ -111,12 +129,18 @@ app.include_router(stripe_router)
 app.include_router(email_router)
 app.include_router(static_router)
 app.include_router(org_router)
+app.include_router(stats_router)
 
 # Graceful shutdown handler
 async def grace_shutdown(signal, loop):
     logger.info(f"Received signal {signal.name}, shutting down gracefully...")
+    await stop_stats_log()
+    await stop_analysis_sink()
+    await stop_price_watch()
     await close_mongo_connection()  # Close MongoDB connection here
+    await stop_task_event_listener()
     await close_redis_connection()  # Close Redis connection here
+    await stop_image_pipeline()
     # Add any other shutdown cleanup logic (e.g., closing Redis if you're using it)
     loop.stop()
 
@@ -0,0 +1,124 @@
+"""Moves the cart, liked_images, browsed_images and shipping_info arrays out of the
+users documents into their own collections (see database/user_collections.py).
+
+The API only reads the collections, so run this as part of the deploy that ships
+them. Entries are upserted on (user_id, entry key), so an interrupted run can simply
+be started again. A user's arrays are only removed once every entry is written.
+Entries without the key, or repeating a key already in the array (the unique index
+allows one per user), are logged and their user keeps the arrays. With
+--drop-duplicates repeated keys only keep their first entry, e.g. for browsing
+history, which was appended to without a check. Run from the server directory:
+
+    python migrate_user_arrays.py [--batch-size 500] [--dry-run] [--keep-arrays] [--drop-duplicates]
+"""
+import argparse
+import asyncio
+import logging
+from bson import ObjectId
+from dotenv import load_dotenv
+from pymongo import UpdateOne
+
+load_dotenv()
+
+from db import connect_to_mongo, close_mongo_connection, get_database
+from database.user_collections import ENTRY_KEYS, USER_ARRAY_FIELDS, ensure_indexes
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+def entry_operations(user_id: str, field: str, entries: list):
+    """The upserts for one array, and the entries that can't be moved without losing data:
+    those without the entry key and repeats of a key already in the array, which the
+    unique (user_id, entry key) index would merge into one document."""
+    entry_key = ENTRY_KEYS[field]
+    operations, left_behind, seen = [], [], set()
+    for entry in entries:
+        if not isinstance(entry, dict) or entry.get(entry_key) is None:
+            left_behind.append(("missing key", entry))
+            continue
+        key = entry[entry_key]
+        if key in seen:
+            left_behind.append(("duplicate", entry))
+            continue
+        seen.add(key)
+        entry = {k: v for k, v in entry.items() if k not in ("_id", "user_id")}
+        # ObjectIds made here increase in array order, which keeps the old oldest-first order
+        operations.append(UpdateOne(
+            {"user_id": user_id, entry_key: key},
+            {"$setOnInsert": {"_id": ObjectId(), "user_id": user_id, **entry}},
+            upsert=True,
+        ))
+    return operations, left_behind
+
+
+async def migrate_user(db, user: dict, dry_run: bool, keep_arrays: bool, drop_duplicates: bool):
+    """Copies the user's arrays, then removes them unless something could not be copied.
+    Returns ({field: entries copied}, complete)."""
+    user_id = user["user_id"]
+    counts, complete = {}, True
+    for field in USER_ARRAY_FIELDS:
+        entries = user.get(field) or []
+        operations, left_behind = entry_operations(user_id, field, entries)
+        counts[field] = len(operations)
+        for reason, entry in left_behind:
+            logger.warning(f"User {user_id}: {field} entry not copied ({reason}): {entry!r}")
+            if not (drop_duplicates and reason == "duplicate"):
+                complete = False
+        if operations and not dry_run:
+            result = await db[field].bulk_write(operations, ordered=False)
+            written = result.upserted_count + result.matched_count
+            if written != len(operations):
+                logger.warning(f"User {user_id}: {field} has {len(operations)} entries but {written} were written")
+                complete = False
+    if not complete:
+        logger.warning(f"User {user_id}: keeping the arrays on the user document, fix the entries above and re-run")
+    elif not dry_run and not keep_arrays:
+        await db.users.update_one(
+            {"_id": user["_id"]},
+            {"$unset": {field: "" for field in USER_ARRAY_FIELDS}},
+        )
+    return counts, complete
+
+
+async def migrate(batch_size: int, dry_run: bool, keep_arrays: bool, drop_duplicates: bool):
+    await connect_to_mongo()
+    try:
+        db = get_database()
+        if not dry_run:
+            await ensure_indexes(db)
+        query = {"$or": [{field: {"$exists": True}} for field in USER_ARRAY_FIELDS]}
+        projection = {"user_id": 1, **{field: 1 for field in USER_ARRAY_FIELDS}}
+        users = incomplete = 0
+        totals = dict.fromkeys(USER_ARRAY_FIELDS, 0)
+        async for user in db.users.find(query, projection, batch_size=batch_size):
+            if not user.get("user_id"):
+                logger.warning(f"Skipping user document {user['_id']} without a user_id")
+                continue
+            counts, complete = await migrate_user(db, user, dry_run, keep_arrays, drop_duplicates)
+            users += 1
+            incomplete += not complete
+            for field, count in counts.items():
+                totals[field] += count
+            if users % batch_size == 0:
+                logger.info(f"{users} users migrated")
+        summary = ", ".join(f"{count} {field}" for field, count in totals.items())
+        logger.info(f"{'Would migrate' if dry_run else 'Migrated'} {users} users: {summary}")
+        if incomplete:
+            logger.warning(f"{incomplete} users have entries that could not be copied and keep their arrays, see the warnings above")
+    finally:
+        await close_mongo_connection()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--batch-size", type=int, default=500, help="users read per round trip")
+    parser.add_argument("--dry-run", action="store_true", help="only count what would be migrated")
+    parser.add_argument("--keep-arrays", action="store_true", help="copy the entries but leave the arrays on the users")
+    parser.add_argument("--drop-duplicates", action="store_true", help="remove the arrays even if they repeat an entry key, the first entry is kept")
+    args = parser.parse_args()
+    asyncio.run(migrate(args.batch_size, args.dry_run, args.keep_arrays, args.drop_duplicates))
+
+
+if __name__ == "__main__":
+    main()
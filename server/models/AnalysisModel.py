@@ -1,9 +1,12 @@
-from typing import List
-from pydantic import BaseModel
+from datetime import datetime
+from typing import Dict, List, Optional
+from pydantic import BaseModel, Field
 
 class AnalysisModel(BaseModel):
 	task_id : str
 	index : int
-	time_taken : str
+	time_taken : Dict[str, float]  # seconds per image index
 	prompts : List[str]
-	status :  str
\ No newline at end of file
+	status : Dict[str, str]  # image index -> completed/failed/skipped/cancelled/processing
+	total_time_taken : Optional[float] = None
+	timestamp : datetime = Field(default_factory=datetime.utcnow)
\ No newline at end of file
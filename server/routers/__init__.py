@@ -9,6 +9,7 @@ from routers.email import email_router
 from routers.static import static_router
 from routers.prices import prices_router
 from routers.organization import org_router
+from routers.stats import stats_router
 
 __all__ = [
     "imagen_router",
@@ -21,5 +22,6 @@ __all__ = [
     "stripe_router",
     "email_router",
     "prices_router",
-    "org_router"
+    "org_router",
+    "stats_router"
 ]
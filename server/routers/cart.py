@@ -4,7 +4,8 @@ from inspect import currentframe, getframeinfo
 from fastapi import APIRouter, HTTPException, BackgroundTasks  # , Request
 from pydantic import BaseModel
 from dotenv import load_dotenv
-from aws_utils import generate_presigned_url, processAndSaveImage
+from aws_utils import image_urls, processAndSaveImages, CART_THUMBNAIL_BUCKET
+from utils.image_pipeline import FULL
 from fastapi import Depends
 import logging
 from db import get_db_ops
@@ -124,13 +125,11 @@ async def view_cart(
         if not user_id:
             raise HTTPException(status_code=401, detail={'message':"User ID is required.",'currentFrame': getframeinfo(currentframe())})
         result = await db_ops.get(user_id)
+        thumbnails = image_urls([cart_item["thumbnail"] for cart_item in result], "thumbnails-cart")
+        images = image_urls([cart_item["img_id"] for cart_item in result], "browse-image-v2")
         for cart_item in result:
-            cart_item["thumbnail"] = generate_presigned_url(
-                cart_item["thumbnail"], "thumbnails-cart"
-            )
-            cart_item["image"] = generate_presigned_url(
-                cart_item["img_id"], "browse-image-v2"
-            )
+            cart_item["thumbnail"] = thumbnails[cart_item["thumbnail"]]
+            cart_item["image"] = images[cart_item["img_id"]]
         return {"cart": result}
     except HTTPException as http_exc:
         if http_exc.status_code == 422:
@@ -167,11 +166,12 @@ async def move_to_another_cart(
 ):
     try:
         toggled = request_data.toggled
-        if toggled:
-            processAndSaveImage(toggled, request_data.img_id, "browse-image-v2")
         thumbnail = request_data.thumbnail
         thumbnail_id = f"t_{request_data.img_id}"
-        processAndSaveImage(thumbnail, thumbnail_id, "thumbnails-cart")
+        uploads = [(thumbnail, thumbnail_id, CART_THUMBNAIL_BUCKET, FULL)]
+        if toggled:
+            uploads.append((toggled, request_data.img_id, "browse-image-v2", FULL))
+        await processAndSaveImages(uploads)
         request_data.thumbnail = thumbnail_id
         request_data.toggled = None
         return True
@@ -4,12 +4,14 @@ from inspect import currentframe, getframeinfo
 from fastapi import APIRouter, HTTPException, BackgroundTasks  # , Request
 from pydantic import BaseModel
 from dotenv import load_dotenv
-from aws_utils import generate_presigned_url, processAndSaveImage
+from aws_utils import image_url, image_urls, processAndSaveImage
 from fastapi import Depends
 import logging
+from typing import Optional
 from db import get_db_ops
 from database.BASE import BaseDatabaseOperation
 from database.LikedImageOperations import LikedImageOperations
+from database.user_collections import DEFAULT_PAGE_SIZE
 
 from utils.update_like import like_image, unlike_image
 from verification import verify_id_token
@@ -72,17 +74,28 @@ async def like_image_route(
 
 @favorite_router.get("/get_liked_images")
 async def get_liked_images(
+    cursor: Optional[str] = None,
+    limit: Optional[int] = None,
     user_id: str = Depends(verify_id_token),
     db_ops: BaseDatabaseOperation = Depends(get_db_ops(LikedImageOperations)),
 ):
     try:
         if not user_id:
             raise HTTPException(status_code=401, detail={'message': "User ID is required.", 'currentFrame': getframeinfo(currentframe())})
-        liked_images = await db_ops.get(user_id)
+        response = {}
+        if cursor or limit:
+            # paginated, newest first, pass next_cursor back for the following page
+            try:
+                liked_images, response["next_cursor"] = await db_ops.get_page(user_id, cursor, limit or DEFAULT_PAGE_SIZE)
+            except ValueError as e:
+                raise HTTPException(status_code=400, detail={'message': str(e), 'currentFrame': getframeinfo(currentframe())})
+        else:
+            liked_images = await db_ops.get(user_id)
+        urls = image_urls([image["img_id"] for image in liked_images], "browse-image-v2")
         for image in liked_images:
-            img_id = image["img_id"]
-            image["signed_url"] = generate_presigned_url(img_id, "browse-image-v2")
-        return {"liked_images": liked_images}
+            image["signed_url"] = urls[image["img_id"]]
+        response["liked_images"] = liked_images
+        return response
     except HTTPException as http_exc:
         checkUnprocessibleEntity(http_exc)
         raise http_exc
@@ -95,7 +108,7 @@ async def get_liked_images(
     img_id: str,
 ):
     try:
-        url = generate_presigned_url(img_id, "browse-image-v2")
+        url = image_url(img_id, "browse-image-v2")
         return {"url": url}
     except HTTPException as http_exc:
         checkUnprocessibleEntity(http_exc)
@@ -5,10 +5,13 @@ from datetime import datetime
 import difflib
 import io
 import json
+import re
+import time
 from typing import Callable, Optional
 import uuid
 import openai
-from fastapi import APIRouter, HTTPException, BackgroundTasks
+from fastapi import APIRouter, HTTPException, BackgroundTasks, Request
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
 from openai import AsyncOpenAI, OpenAI
 from dotenv import load_dotenv
@@ -23,19 +26,19 @@ from database.BrowsedImageOperations import BrowsedImageOperations
 from database.BASE import BaseDatabaseOperation
 from database.SaltOperations import SaltOperations
 from database.PromptOperations import PromptOperations
-from database.AnalysisOperations import AnalysisOperations
-from ai_models.ImageGenerator import ImageGenerator
-from ai_models.OpenAIImageGenerator import OpenAIImageGenerator
-from ai_models.TitanImageGenerator import TitanImageGenerator
-from ai_models.StableDiffusionGenerator import StableDiffusionGenerator
 from utils.error_check import handle_openai_error
-from utils.record_images import record_prompt_and_image
-from utils.save_analysis import save_analysis
+from utils.record_images import record_prompt_and_image, record_browsed_image, browse_image_url
+from utils.analysis_sink import analysis_sink
+from utils.prompt_cache import get_cached_prompts, cache_prompts
+from utils.task_store import create_task, get_task, update_task, delete_task
+from utils.image_store import load_generated_image, load_generated_image_meta, generated_image_keys
+from utils.task_events import subscribe_task_events, publish_task_cancel, TASK_EVENT_POLL_INTERVAL
+from utils.image_generation import task_timeout, image_delivery_mode, start_image_slot, cancel_generation
 from verification import verify_id_token
 from botocore.client import Config
 import asyncio
 from email_service.EmailService import EmailService
-from profanity_check import predict, predict_prob
+from utils.moderation import is_profane
 from redis import get_redis_database
 
 load_dotenv()
@@ -63,106 +66,49 @@ class ImageRequest(BaseModel):
     task_id: str
     user_key: Optional[str] = None
 
+class StreamImagesRequest(BaseModel):
+    prompt: str
+    task_id: str
+    user_key: Optional[str] = None
+
 key = os.environ.get("OPENAI_KEY")
 client = AsyncOpenAI(api_key=key)
-def get_ai_model(class_type: type[ImageGenerator]) -> Callable:
-    def dependency():
-        return class_type()
-    return dependency
 
 async def set_redis_task(user_id, task_id, task_info):
-    redis = get_redis_database()
-    await redis.hset(f"user:{user_id}:tasks", task_id, json.dumps(task_info))
-
-async def set_redis_images(user_id, task_id, index, task_info):
-    redis = get_redis_database()
-    await redis.hset(f"user:{user_id}:tasks:{task_id}:images", index, json.dumps(task_info))
+    await create_task(user_id, task_id, task_info, ttl=task_timeout)
 
 async def get_redis_task(user_id, task_id):
-    redis = get_redis_database()   
-    task_info = await redis.hget(f"user:{user_id}:tasks", task_id)
-    return json.loads(task_info) if task_info else None
+    return await get_task(user_id, task_id)
 
 async def get_redis_images(user_id, task_id, index):
-    redis = get_redis_database()   
-    task_info = await redis.hget(f"user:{user_id}:tasks:{task_id}:images", index)
-    return json.loads(task_info) if task_info else None
+    return await load_generated_image(user_id, task_id, index)
 
 async def delete_redis_task(user_id, task_id):
-    redis = get_redis_database()   
-    await redis.hdel(f"user:{user_id}:tasks", task_id)
-    for i in range(6):
-        await redis.hdel(f"user:{user_id}:tasks:{task_id}:images", str(i))
+    await delete_task(user_id, task_id, *generated_image_keys(user_id, task_id))
 
 async def clear_taskstorage(user_id, task_id):
     redis = get_redis_database()   
     await delete_redis_task(user_id, task_id)
 
-task_timeout = 600 
-async def schedule_task_deletion(user_id, task_id, task_timeout):
-    await asyncio.sleep(task_timeout)
-    await clear_taskstorage(user_id, task_id)
-
-async def record_analysis(background_tasks, analysis_db_ops, user_id, task_id, idx):
+async def record_analysis(user_id, task_id, idx):
     task_info = await get_redis_task(user_id, task_id)
     if task_info:
         analysis_data = AnalysisModel(
                 task_id= task_id,
                 index= idx,
-                time_taken= json.dumps(task_info['time_taken'] if 'time_taken' in task_info else {}),
+                time_taken= {image_idx: float(seconds) for image_idx, seconds in task_info['time_taken'].items()},
                 prompts= task_info['prompts'],
-                status= json.dumps(task_info['image_status'])
+                status= task_info['image_status'],
+                total_time_taken= float(task_info['total_time_taken']) if 'total_time_taken' in task_info else None
             )
-        background_tasks.add_task(
-            save_analysis,
-            analysis= analysis_data,
-            db_ops=analysis_db_ops
-        )     
+        analysis_sink.add(analysis_data) # written in batches by the sink
         await clear_taskstorage(user_id, task_id)
 
 
-async def task_callback(user_id, task_id, index, isFailed, duration, image=None, model=None):
-    logger.info(f"Image Generation index: [{index}], took -> {duration.total_seconds():.2f} seconds")
-    redis = get_redis_database()
-    lock_key = f"lock:{user_id}:{task_id}"
-    
-    try:
-        lock = await redis.setnx(lock_key, "locked")
-        if lock:
-            try:
-                await redis.expire(lock_key, 10)  # Set an expiration to avoid deadlock
-
-                task_info = await get_redis_task(user_id, task_id)
-                if task_info:
-                    if 'image_status' not in task_info:
-                        task_info['image_status'] = {}
-                    if 'time_taken' not in task_info:
-                        task_info['time_taken'] = {}
-                    # if 'image' not in task_info:
-                        # task_info['image'] = {}
-
-                    if image is not None and model is not None:
-                        # task_info['image'][index] = (index, image, model)
-                        await set_redis_images(user_id, task_id, index, (index, image, model))
-
-                    task_info['time_taken'][index] = f"{duration.total_seconds():.2f} seconds"
-                    task_info['image_status'][index] = 'completed' if not isFailed else 'failed'
-                    
-                    await set_redis_task(user_id, task_id, task_info)
-            except Exception as e:
-                logger.info('Redis - setting data error (1)', str(e))
-            finally:
-                await redis.delete(lock_key)
-        else:
-            logger.warning("Failed to acquire lock, retrying...")
-            await asyncio.sleep(1)
-            await task_callback(user_id, task_id, index, isFailed, duration, image, model)
-    except Exception as e:
-        logger.info('Redis - setting data error (2)', str(e))
-    finally:
-        pass
+# a complete "PromptN": "..." pair inside a partially streamed completion
+STREAMED_PROMPT_PATTERN = re.compile(r'"(Prompt[123])"\s*:\s*"((?:[^"\\]|\\.)*)"')
 
-async def generate_prompts(prompt: str):
+async def generate_prompts(prompt: str, on_prompt: Optional[Callable] = None):
     
     messages = [
         {"role": "system", "content": """You are a prompt engineering assistant with a focus on optimizing prompts for generating 
@@ -210,21 +156,47 @@ async def generate_prompts(prompt: str):
         "content": prompt
         }
     ]
+    response_text = ""
+    emitted = set()
     try:
-        completion = await client.chat.completions.create(
+        stream = await client.chat.completions.create(
         model="gpt-3.5-turbo",
         messages=messages,
-        response_format= { "type": "json_object" }
+        response_format= { "type": "json_object" },
+        stream=True
         )
+        async for chunk in stream:
+            if not chunk.choices or not chunk.choices[0].delta.content:
+                continue
+            response_text += chunk.choices[0].delta.content
+            if on_prompt:
+                # hand each prompt over as soon as its closing quote arrives
+                for match in STREAMED_PROMPT_PATTERN.finditer(response_text):
+                    if match.group(1) not in emitted:
+                        emitted.add(match.group(1))
+                        try:
+                            on_prompt(match.group(1), json.loads(f'"{match.group(2)}"'))
+                        except json.JSONDecodeError:
+                            pass
     except openai.OpenAIError as e:
         handle_openai_error(e)      
-    return completion.choices[0].message.content
+    return response_text
     
+async def enhance_prompts(prompt: str, on_prompt: Callable, max_retries: int = 3):
+    response_json = await get_cached_prompts(prompt)
+    if response_json:
+        return response_json
+    for _ in range(max_retries + 1):
+        response_text = await generate_prompts(prompt, on_prompt)
+        response_json, message = validate_structure(response_text)
+        if response_json:
+            await cache_prompts(prompt, response_json)
+            return response_json
+        logger.warning(f"Invalid prompt enhancement: {message}")
+    raise HTTPException(status_code=409, detail={'message':"The chance of this not working is 1 in a million, but it just happened. Please try again.",'currentFrame': getframeinfo(currentframe())}) 
+
 @imagen_router.post("/ask_gpt")
 async def generate_text(request: AskGPTRequest, 
-                        retry: int = 0,
-                        ai_model_primary = Depends(get_ai_model(TitanImageGenerator)),
-                        ai_model_secondary = Depends(get_ai_model(OpenAIImageGenerator)),
                         salt_db_ops: SaltOperations = Depends(get_db_ops(SaltOperations)),
                         user_id: str = Depends(verify_id_token),                       
                         ):
@@ -233,40 +205,48 @@ async def generate_text(request: AskGPTRequest,
             user_id = await salt_db_ops.decrypt_and_remove(EncryptModel(salt_id=request.user_key, encrypted_data=user_id), remove_key=False)
         if len(request.prompt) > 600:   
             raise HTTPException(status_code=400, detail={'message':"Prompt is too long",'currentFrame': getframeinfo(currentframe())})
-        profane = predict([request.prompt])   
-        if (profane[0] == 1):
+        if await is_profane(request.prompt):
             raise HTTPException(status_code=400, detail={'message':"Profanity detected in prompt",'currentFrame': getframeinfo(currentframe())})                
-        response_text = await generate_prompts(request.prompt)    
-        response_json, message = validate_structure(response_text)
-        if not response_json:
-            if retry < 3:
-                return await generate_text(request, retry=retry+1, ai_model_primary=ai_model_primary, ai_model_secondary=ai_model_secondary, salt_db_ops=salt_db_ops, user_id=user_id)
-            else:
-                raise HTTPException(status_code=409, detail={'message':"The chance of this not working is 1 in a million, but it just happened. Please try again.",'currentFrame': getframeinfo(currentframe())}) 
-        
-        task_id = str(uuid.uuid4())
-        enhanced_prompts = [response_json['Prompts'][i][f'Prompt{i+1}'] for i in range(3)]      
-        image_tasks = (
-            [ai_model_primary.generate_single_image(idx, prompt, task_callback, user_id, task_id) for idx, prompt in enumerate(enhanced_prompts)] +
-            [ai_model_secondary.generate_single_image(idx+3, prompt, task_callback, user_id, task_id) for idx, prompt in enumerate(enhanced_prompts)]
-        )
-        task = asyncio.create_task(
-        handle_image_generation(task_id, image_tasks, user_id),
-            name=f"image-gen-{task_id}" 
-        )
 
+        task_id = str(uuid.uuid4())
         task_info = {
             "status": "processing",
-            "prompts": enhanced_prompts
+            "prompts": [request.prompt] * 3
         }
         task_info["image_status"] = {}
-        for i in range(len(enhanced_prompts)):
-            task_info["image_status"][i] = 'processing'
-            task_info["image_status"][i+3] = 'processing'
-
+        for i in range(3):
+            task_info["image_status"][str(i)] = 'processing'
+            task_info["image_status"][str(i+3)] = 'processing'
         await set_redis_task(user_id, task_id, task_info)
 
-        asyncio.create_task(schedule_task_deletion(user_id, task_id, task_timeout))
+        # Prompt1 is the user's prompt by contract, so its images start right away;
+        # Prompt2 and Prompt3 start as soon as they are streamed out of the enhancement.
+        created_at = time.time()
+        launched_prompts = {}
+
+        def launch_prompt(name, prompt):
+            idx = int(name[-1]) - 1
+            if idx not in launched_prompts and prompt.strip():
+                launched_prompts[idx] = prompt
+                start_image_slot(idx, prompt, user_id, task_id, created_at)
+
+        launch_prompt("Prompt1", request.prompt)
+        try:
+            response_json = await enhance_prompts(request.prompt, launch_prompt)
+        except BaseException:
+            for idx in launched_prompts:
+                await publish_task_cancel(user_id, task_id, idx)
+            await clear_taskstorage(user_id, task_id)
+            raise
+
+        for idx in range(3):
+            launch_prompt(f"Prompt{idx+1}", response_json['Prompts'][idx][f'Prompt{idx+1}'])
+            launch_prompt(f"Prompt{idx+1}", request.prompt) # blank enhancement, fall back to the user's prompt
+        # report the prompts that were actually generated, streamed values win over a retried completion
+        enhanced_prompts = [launched_prompts[idx] for idx in range(3)]
+        response_json['Prompts'] = [{f"Prompt{idx+1}": prompt} for idx, prompt in enumerate(enhanced_prompts)]
+
+        await update_task(user_id, task_id, prompts=enhanced_prompts)
         response_json['task_id'] = task_id
         return {"response": response_json}
     except openai.OpenAIError as e:
@@ -277,47 +257,14 @@ async def generate_text(request: AskGPTRequest,
         logger.error(f"Error in assigning image task: {str(e)}", exc_info=True)
         raise HTTPException(status_code=500, detail={'message':f"Error in assigning image task: {str(e)}", 'currentFrame': getframeinfo(currentframe()), 'detail': str(traceback.format_exc())})
 
-async def handle_image_generation(task_id, image_tasks, user_id):
-    start = datetime.now()
-    await asyncio.gather(*image_tasks, return_exceptions=True)
-    duration = datetime.now() - start
-    logger.info(f"Success - Total image Generation took -> {duration.total_seconds():.2f} seconds")
-    
-    redis = get_redis_database()
-    lock_key = f"lock:{user_id}:{task_id}"
-    try:
-        lock = await redis.setnx(lock_key, "locked")
-        if lock:
-            try:
-                await redis.expire(lock_key, 10)  # Set an expiration to avoid deadlock
-                
-                task_info = await get_redis_task(user_id, task_id)
-                if task_info:
-                    task_info["status"] = "completed"
-                    task_info["total_time_taken"] = f"{duration.total_seconds():.2f} seconds"
-                    await set_redis_task(user_id, task_id, task_info)
-
-            except Exception as e:
-                logger.info('Redis - setting data error (3)', str(e))
-            finally:
-                await redis.delete(lock_key)
-        else:
-            logger.warning("Failed to acquire lock, retrying...")
-            await asyncio.sleep(1)
-            await task_callback(user_id, task_id, index, isFailed, duration, image, model)
-    except Exception as e:
-        logger.info('Redis - setting data error (4)', str(e))
-    finally:
-        pass
-        
 @imagen_router.post("/get_image")
 async def get_generated_image(
     request: ImageRequest,
+    http_request: Request,
     background_tasks: BackgroundTasks,
     user_id: str = Depends(verify_id_token),
     db_ops: BaseDatabaseOperation = Depends(get_db_ops(BrowsedImageOperations)),
     salt_db_ops: SaltOperations = Depends(get_db_ops(SaltOperations)),
-    analysis_db_ops: BaseDatabaseOperation = Depends(get_db_ops(AnalysisOperations)),
 ):
     try:
         if request.user_key: # user_key only exists for guest users
@@ -329,55 +276,77 @@ async def get_generated_image(
             raise HTTPException(status_code=400, detail={'message':"Please try again",'currentFrame': getframeinfo(currentframe())})
 
         image_status = task_info['image_status']
-        if task_info['status'] == 'processing':
-            if image_status != None and (image_status[str(request.idx)] == 'completed' and image_status[str(request.idx + 3)] == 'completed'):
-                pass
-            else:
-                counter = 0
-                max_wait = 60 # worst case wait for 60 seconds
-                while (
-                    task_info != None and
-                    task_info['status'] == 'processing' and
-                    (
-                        image_status[str(request.idx)] == "processing" or
-                        image_status[str(request.idx + 3)] == 'processing'
-                    ) and
-                    counter < max_wait
-                ):
-                    counter = counter + 1
-                    await asyncio.sleep(1)
+        primary_idx, secondary_idx = str(request.idx), str(request.idx + 3)
+
+        def waiting_for_image(task_info, image_status):
+            # the primary is always preferred, so the secondary only matters once the primary did not complete
+            return task_info['status'] == 'processing' and (
+                image_status[primary_idx] == 'processing' or
+                (image_status[primary_idx] != 'completed' and image_status[secondary_idx] == 'processing')
+            )
+
+        if waiting_for_image(task_info, image_status):
+            max_wait = 60 # worst case wait for 60 seconds
+            loop = asyncio.get_running_loop()
+            deadline = loop.time() + max_wait
+            with subscribe_task_events(user_id, task_id) as task_events:
+                task_info = await get_redis_task(user_id, task_id)
+                if task_info:
+                    image_status = task_info['image_status']
+                while task_info != None and waiting_for_image(task_info, image_status) and loop.time() < deadline:
+                    # woken by task_callback as soon as any image of this task settles
+                    await task_events.wait(min(TASK_EVENT_POLL_INTERVAL, deadline - loop.time()))
+                    if await http_request.is_disconnected():
+                        await cancel_generation(user_id, task_id, request.idx)
+                        raise HTTPException(status_code=499, detail={'message':"Client closed request",'currentFrame': getframeinfo(currentframe())})
                     task_info = await get_redis_task(user_id, task_id)
                     if task_info:
                         image_status = task_info['image_status']
 
-                task_info = await get_redis_task(user_id, task_id)
-                if not task_info:
-                    raise HTTPException(status_code=400, detail={'message':"Please try again",'currentFrame': getframeinfo(currentframe())})
-                image_status = task_info['image_status']
+            if not task_info:
+                raise HTTPException(status_code=400, detail={'message':"Please try again",'currentFrame': getframeinfo(currentframe())})
 
         if task_info['status'] == 'processing' and (image_status != None and (image_status[str(request.idx)] == 'failed' and image_status[str(request.idx + 3)] == 'failed')):
             logger.error(f"Both primary and secondary images failed to generate: Prompt Violates Our Content Policy (1)", exc_info=True)
-            await record_analysis(background_tasks, analysis_db_ops, user_id, request.task_id, request.idx)
+            await record_analysis(user_id, request.task_id, request.idx)
             raise HTTPException(status_code=400, detail={'message':"Prompt Violates Our Content Policy",'currentFrame': getframeinfo(currentframe())})
 
         if task_info['status'] == 'completed' or (image_status != None and (image_status[str(request.idx)] == 'completed' or image_status[str(request.idx + 3)] == 'completed')):
-            images = {
-                str(request.idx): await get_redis_images(user_id, task_id, str(request.idx)),
-                str(request.idx+3): await get_redis_images(user_id, task_id, str(request.idx+3))
-            }
-            # images = task_info['image']
+            if image_delivery_mode == "url":
+                meta = await load_generated_image_meta(user_id, task_id, request.idx) or await load_generated_image_meta(user_id, task_id, request.idx + 3)
+                if meta and 'img_id' in meta: # otherwise the upload failed and the photo is returned inline
+                    if 'processing' in (image_status[primary_idx], image_status[secondary_idx]):
+                        await cancel_generation(user_id, task_id, request.idx)
+                    browsed_data = BrowsedImageDataModel(
+                        img_id=meta['img_id'], prompt=request.prompt, timestamp=datetime.utcnow()
+                    )
+                    background_tasks.add_task(
+                        record_browsed_image,
+                        browsed_data=browsed_data,
+                        db_ops=db_ops,
+                        user_id=user_id,
+                    )
+                    await record_analysis(user_id, request.task_id, request.idx)
+                    return {"img_id": meta['img_id'], "url": browse_image_url(meta['img_id'])}
+
+            # the secondary is only read when the primary is missing
+            images = {str(request.idx): await get_redis_images(user_id, task_id, str(request.idx))}
+            if images[str(request.idx)] == None:
+                images[str(request.idx+3)] = await get_redis_images(user_id, task_id, str(request.idx+3))
             if images and images != None:
                 primary_image = images[str(request.idx)] if str(request.idx) in images else None
                 if isinstance(primary_image, Exception) or primary_image == None:
                     secondary_image = images[str(request.idx+3)] if str(request.idx+3) in images else None
                     if isinstance(secondary_image, Exception) or secondary_image == None:
                         logger.error(f"Both primary and secondary images failed to generate: Prompt Violates Our Content Policy (2)", exc_info=True)
-                        await record_analysis(background_tasks, analysis_db_ops, user_id, request.task_id, request.idx)
+                        await record_analysis(user_id, request.task_id, request.idx)
                         raise HTTPException(status_code=400, detail={'message':"Prompt Violates Our Content Policy",'currentFrame': getframeinfo(currentframe())})
                     else:
-                        photo = {"idx": request.idx + 3, "photo": secondary_image[1], "name": secondary_image[2]}
+                        photo = {"idx": request.idx + 3, "photo": base64.b64encode(secondary_image[1]).decode('utf-8'), "name": secondary_image[2]}
                 else:
-                    photo = {"idx": request.idx, "photo": primary_image[1], "name": primary_image[2]}
+                    photo = {"idx": request.idx, "photo": base64.b64encode(primary_image[1]).decode('utf-8'), "name": primary_image[2]}
+                if 'processing' in (image_status[primary_idx], image_status[secondary_idx]):
+                    await cancel_generation(user_id, task_id, request.idx)
                 img_id = str(uuid.uuid4())       
                 timestamp = datetime.utcnow()
 
@@ -391,16 +360,16 @@ async def get_generated_image(
                     db_ops=db_ops,
                     user_id=user_id,
                 )
-                await record_analysis(background_tasks, analysis_db_ops, user_id, request.task_id, request.idx)
+                await record_analysis(user_id, request.task_id, request.idx)
                 return {"photo": photo['photo'], "img_id": img_id}
             else:
-                await record_analysis(background_tasks, analysis_db_ops, user_id, request.task_id, request.idx)
+                await record_analysis(user_id, request.task_id, request.idx)
                 raise HTTPException(status_code=400, detail={'message':"Images not found",'currentFrame': getframeinfo(currentframe())})
         elif task_info['status'] == 'failed':
-            await record_analysis(background_tasks, analysis_db_ops, user_id, request.task_id, request.idx)
+            await record_analysis(user_id, request.task_id, request.idx)
             raise HTTPException(status_code=500, detail={'message':"Image generation failed",'currentFrame': getframeinfo(currentframe())})
         else:
-            await record_analysis(background_tasks, analysis_db_ops, user_id, request.task_id, request.idx)
+            await record_analysis(user_id, request.task_id, request.idx)
             raise HTTPException(status_code=500, detail={'message':"Unexpected task status",'currentFrame': getframeinfo(currentframe())})
     except openai.OpenAIError as e:
         handle_openai_error(e)
@@ -408,7 +377,119 @@ async def get_generated_image(
         raise http_exc
     except Exception as e:
         logger.error(f"Error in get_image: {str(e)}", exc_info=True)
-        await record_analysis(background_tasks, analysis_db_ops, user_id, request.task_id, request.idx)
+        await record_analysis(user_id, request.task_id, request.idx)
+        raise HTTPException(status_code=500, detail={'message':f"Internal Server Error: {str(e)}", 'currentFrame': getframeinfo(currentframe()), 'detail': str(traceback.format_exc())})
+
+def format_sse(event: str, data: dict) -> str:
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+async def stream_task_images(http_request, user_id, task_id, prompt, background_tasks, db_ops):
+    pending = {0, 1, 2}
+    last_status = {}
+    first_idx = None
+    max_wait = 60 # same worst case as /get_image, for the whole task
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + max_wait
+    with subscribe_task_events(user_id, task_id) as task_events:
+        while pending and loop.time() < deadline:
+            task_info = await get_redis_task(user_id, task_id)
+            if not task_info:
+                yield format_sse("error", {"message": "Please try again"})
+                return
+            image_status = task_info['image_status']
+            for idx in sorted(pending):
+                status = {"primary": image_status[str(idx)], "secondary": image_status[str(idx + 3)]}
+                if last_status.get(idx) != status:
+                    last_status[idx] = status
+                    yield format_sse("status", {"idx": idx, **status})
+
+                # whichever provider lands first is served; primary wins a tie
+                image = meta = None
+                for image_idx in (idx, idx + 3):
+                    if image_status[str(image_idx)] == 'completed':
+                        if image_delivery_mode == "url":
+                            meta = await load_generated_image_meta(user_id, task_id, str(image_idx))
+                            if meta and 'img_id' in meta:
+                                break
+                        image = await get_redis_images(user_id, task_id, str(image_idx))
+                        if image:
+                            break
+                if meta and 'img_id' in meta:
+                    browsed_data = BrowsedImageDataModel(
+                        img_id=meta['img_id'], prompt=prompt, timestamp=datetime.utcnow()
+                    )
+                    background_tasks.add_task(
+                        record_browsed_image,
+                        browsed_data=browsed_data,
+                        db_ops=db_ops,
+                        user_id=user_id,
+                    )
+                    yield format_sse("image", {"idx": idx, "img_id": meta['img_id'], "url": browse_image_url(meta['img_id']), "name": meta['model']})
+                    pending.discard(idx)
+                    if 'processing' in status.values():
+                        await cancel_generation(user_id, task_id, idx)
+                    first_idx = idx if first_idx is None else first_idx
+                elif image:
+                    photo = base64.b64encode(image[1]).decode('utf-8')
+                    img_id = str(uuid.uuid4())
+                    browsed_data = BrowsedImageDataModel(
+                        img_id=img_id, prompt=prompt, timestamp=datetime.utcnow()
+                    )
+                    background_tasks.add_task(
+                        record_prompt_and_image,
+                        image=photo,
+                        browsed_data=browsed_data,
+                        db_ops=db_ops,
+                        user_id=user_id,
+                    )
+                    yield format_sse("image", {"idx": idx, "photo": photo, "img_id": img_id, "name": image[2]})
+                    pending.discard(idx)
+                    if 'processing' in status.values():
+                        await cancel_generation(user_id, task_id, idx)
+                    first_idx = idx if first_idx is None else first_idx
+                elif 'processing' not in status.values() or task_info['status'] != 'processing':
+                    yield format_sse("error", {"idx": idx, "message": "Prompt Violates Our Content Policy"})
+                    pending.discard(idx)
+
+            if not pending:
+                break
+            if await http_request.is_disconnected():
+                for idx in pending:
+                    await cancel_generation(user_id, task_id, idx)
+                return
+            if not await task_events.wait(min(TASK_EVENT_POLL_INTERVAL, deadline - loop.time())):
+                yield ": keep-alive\n\n"
+
+    for idx in sorted(pending):
+        yield format_sse("error", {"idx": idx, "message": "Image generation timed out"})
+    yield format_sse("done", {"task_id": task_id})
+    await record_analysis(user_id, task_id, first_idx if first_idx is not None else 0)
+
+@imagen_router.post("/stream_images")
+async def stream_generated_images(
+    request: StreamImagesRequest,
+    http_request: Request,
+    background_tasks: BackgroundTasks,
+    user_id: str = Depends(verify_id_token),
+    db_ops: BaseDatabaseOperation = Depends(get_db_ops(BrowsedImageOperations)),
+    salt_db_ops: SaltOperations = Depends(get_db_ops(SaltOperations)),
+):
+    try:
+        if request.user_key: # user_key only exists for guest users
+            user_id = await salt_db_ops.decrypt_and_remove(EncryptModel(salt_id=request.user_key, encrypted_data=user_id), remove_key=False)
+        task_info = await get_redis_task(user_id, request.task_id)
+        if not task_info:
+            raise HTTPException(status_code=400, detail={'message':"Please try again",'currentFrame': getframeinfo(currentframe())})
+        # background_tasks are attached to the response by FastAPI and run once the stream ends
+        return StreamingResponse(
+            stream_task_images(http_request, user_id, request.task_id, request.prompt, background_tasks, db_ops),
+            media_type="text/event-stream",
+            headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+        )
+    except HTTPException as http_exc:
+        raise http_exc
+    except Exception as e:
+        logger.error(f"Error in stream_images: {str(e)}", exc_info=True)
         raise HTTPException(status_code=500, detail={'message':f"Internal Server Error: {str(e)}", 'currentFrame': getframeinfo(currentframe()), 'detail': str(traceback.format_exc())})
 
 @imagen_router.post("/store_prompt")
@@ -6,15 +6,21 @@ from db import get_db_ops
 from database.BASE import BaseDatabaseOperation
 from models.OrganizationModel import OrganizationModel
 from database.OrganizationOperation import OrganizationOperation
-from fastapi import APIRouter, HTTPException, Depends
-from aws_utils import generate_presigned_url
-import requests
+from typing import Optional
+from fastapi import APIRouter, HTTPException, Depends, Header
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse, Response, StreamingResponse
+from botocore.exceptions import ClientError
+from utils.org_cache import org_config_cache
+from utils.asset_cache import Asset, SKELETON_BUCKET, asset_cache, read_asset
 import base64
+import os
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 org_router = APIRouter()
+ASSET_MAX_AGE = int(os.environ.get("ASSET_MAX_AGE", 3600))  # seconds browsers and CDNs may reuse an asset
 
 @org_router.post("/organisation_list")
 async def organisation_list(
@@ -45,41 +51,91 @@ class org_id(BaseModel):
 class BucketRequest(BaseModel):
     img_id: str
 
+async def cached_organisation(org_id: str, if_none_match: Optional[str], db_ops: OrganizationOperation):
+    """The org config from org_config_cache, or a 304 when the client already has this version."""
+    result, etag = await org_config_cache.get(org_id, db_ops.get_org_by_id)
+    if etag is None:
+        return result
+    # the client revalidates every time, the signed asset URLs inside change over time
+    headers = {"ETag": etag, "Cache-Control": "no-cache"}
+    if if_none_match and etag in [tag.strip() for tag in if_none_match.split(",")]:
+        return Response(status_code=304, headers=headers)
+    return JSONResponse(content=jsonable_encoder(result), headers=headers)
+
 @org_router.post("/get_organisation_by_id")
 async def get_organisation_by_id(
     request : org_id,
+    if_none_match: Optional[str] = Header(None),
+    db_ops: BaseDatabaseOperation = Depends(get_db_ops(OrganizationOperation)),
+):
+    try:
+        return await cached_organisation(request.org_id, if_none_match, db_ops)
+    except Exception as e:
+        logger.error(f"Error in creating Organization: {str(e)}", exc_info=True)
+        raise HTTPException(status_code=500, detail={'message':"Internal Server Error", 'currentFrame': getframeinfo(currentframe()), 'detail': str(traceback.format_exc())})
+
+# same as the POST, as a GET so browsers send If-None-Match on their own
+@org_router.get("/get_organisation_by_id")
+async def get_organisation_by_id_cached(
+    org_id: str,
+    if_none_match: Optional[str] = Header(None),
     db_ops: BaseDatabaseOperation = Depends(get_db_ops(OrganizationOperation)),
 ):
     try:
-        result = await db_ops.get_org_by_id(request.org_id)
-        return result;
+        return await cached_organisation(org_id, if_none_match, db_ops)
     except Exception as e:
         logger.error(f"Error in creating Organization: {str(e)}", exc_info=True)
         raise HTTPException(status_code=500, detail={'message':"Internal Server Error", 'currentFrame': getframeinfo(currentframe()), 'detail': str(traceback.format_exc())})
 
+def asset_headers(asset: Asset) -> dict:
+    headers = {"Cache-Control": f"public, max-age={ASSET_MAX_AGE}"}
+    if asset.etag:
+        headers["ETag"] = asset.etag
+    if asset.last_modified:
+        headers["Last-Modified"] = asset.last_modified
+    return headers
+
+@org_router.get("/asset/{img_id}")
+async def get_skeleton_asset(
+    img_id: str,
+    if_none_match: Optional[str] = Header(None),
+):
+    """Streams a skeleton asset (mask, mockup, logo...) as raw bytes, hot ones from memory."""
+    try:
+        # on a miss S3 checks the ETag itself, so revalidation doesn't download the body
+        asset = await asset_cache.get(SKELETON_BUCKET, f"{img_id}.jpg", if_none_match)
+    except ClientError as e:
+        if e.response.get("Error", {}).get("Code") in ("NoSuchKey", "404"):
+            raise HTTPException(status_code=404, detail={'message':"Asset not found", 'currentFrame': getframeinfo(currentframe())})
+        logger.error(f"Error in get_skeleton_asset: {str(e)}", exc_info=True)
+        raise HTTPException(status_code=500, detail={'message':"Internal Server Error", 'currentFrame': getframeinfo(currentframe()), 'detail': str(traceback.format_exc())})
+
+    headers = asset_headers(asset)
+    if asset.not_modified:
+        return Response(status_code=304, headers=headers)
+    if if_none_match and asset.etag and asset.etag in [tag.strip() for tag in if_none_match.split(",")]:
+        if asset.stream is not None:
+            await asset.stream.aclose()
+        return Response(status_code=304, headers=headers)
+    if asset.content is not None:
+        return Response(content=asset.content, media_type=asset.content_type, headers=headers)
+    if asset.length is not None:
+        headers["Content-Length"] = str(asset.length)
+    return StreamingResponse(asset.stream, media_type=asset.content_type, headers=headers)
+
+# kept for older clients, new code links to /asset/{img_id} instead of inlining base64
 @org_router.post("/convert_bucketurl_to_base64")
 async def convert_bucketurl_to_base64(
     request: BucketRequest,
-    db_ops: BaseDatabaseOperation = Depends(get_db_ops(OrganizationOperation)),
 ):
     try:
-        img_id = request.img_id
-        presigned_url = generate_presigned_url(img_id, "drophouse-skeleton")
-        response = requests.get(presigned_url)
-        
-        if response.status_code == 200:
-            content_type = response.headers.get('Content-Type')
-            
-            if not content_type or not content_type.startswith("image/"):
-                raise ValueError(f"Invalid content type: {content_type}")
-            
-            image_base64 = base64.b64encode(response.content).decode('utf-8')
-            data_url = f"data:{content_type};base64,{image_base64}"
-            
-            return {"data_url": data_url}
-        else:
-            raise ValueError(f"Error downloading image. Status code: {response.status_code}")
-    
+        asset = await read_asset(SKELETON_BUCKET, f"{request.img_id}.jpg")
+        if not asset.content_type.startswith("image/"):
+            raise ValueError(f"Invalid content type: {asset.content_type}")
+
+        image_base64 = base64.b64encode(asset.content).decode('utf-8')
+        data_url = f"data:{asset.content_type};base64,{image_base64}"
+        return {"data_url": data_url}
     except Exception as e:
         print(f"Error processing bucket URL: {e}")
-        return {"error": str(e)}
\ No newline at end of file
+        return {"error": str(e)}
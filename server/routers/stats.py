@@ -0,0 +1,22 @@
+import os
+import hmac
+import logging
+from inspect import currentframe, getframeinfo
+from typing import Optional
+from fastapi import APIRouter, HTTPException, Header
+from utils.runtime_stats import collect_stats
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# /stats answers 404 unless this is set and sent as the X-Stats-Token header
+STATS_TOKEN = os.environ.get("STATS_TOKEN")
+
+stats_router = APIRouter()
+
+
+@stats_router.get("/stats")
+async def get_stats(x_stats_token: Optional[str] = Header(None)):
+    if not STATS_TOKEN or not x_stats_token or not hmac.compare_digest(x_stats_token, STATS_TOKEN):
+        raise HTTPException(status_code=404, detail={'message': "Not Found", 'currentFrame': getframeinfo(currentframe())})
+    return collect_stats()
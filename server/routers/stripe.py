@@ -14,7 +14,7 @@ from database.BASE import BaseDatabaseOperation
 from db import get_db_ops
 from models.CheckoutModel import CheckoutModel
 from models.EncryptModel import EncryptModel
-from aws_utils import generate_presigned_url, processAndSaveImage
+from aws_utils import image_url, processAndSaveImages, CART_THUMBNAIL_BUCKET
 from database.OrderOperations import OrderOperations
 from database.UserOperations import UserOperations
 from database.CartOperations import CartOperations
@@ -22,7 +22,7 @@ from database.LikedImageOperations import LikedImageOperations
 from database.PricesOperations import PricesOperations
 from routers.cart import remove_from_cart
 from email_service.EmailService import EmailService
-from utils.stripe_utils import capitalize_first_letter
+from utils.stripe_utils import capitalize_first_letter, checkout_image_uploads
 from utils.update_like import unlike_image
 from verification import verify_id_token
 from routers.order_info import PlaceOrderDataRequest, place_order
@@ -57,16 +57,7 @@ async def create_student_checkout(
         org_id = CheckoutModel.org_id
         org_name = CheckoutModel.org_name
         print(org_name)
-        for item in CheckoutModel.products:
-            img_id = item.img_id
-            thumbnail = item.thumbnail
-            thumbnail_img_id = "t_" + img_id
-            if thumbnail and thumbnail.startswith("data:image"):
-                processAndSaveImage(thumbnail, thumbnail_img_id, "thumbnails-cart")
-                item.thumbnail = thumbnail_img_id
-            if item.toggled and isinstance(item.toggled, str) and item.toggled.startswith("data:image"):
-                processAndSaveImage(item.toggled, f"e_{item.img_id}", "browse-image-v2")
-                item.toggled = True
+        await processAndSaveImages(checkout_image_uploads(CheckoutModel.products))
 
         items = CheckoutModel.products
         print(items)
@@ -92,7 +83,7 @@ async def create_student_checkout(
         items = order_model.item
         for item in items:
             thumbnail_img_id = "t_" + item.img_id
-            thumbnail = generate_presigned_url(thumbnail_img_id, "thumbnails-cart")
+            thumbnail = image_url(thumbnail_img_id, "thumbnails-cart")
 
             message_body += f'<div style="display:flex">\
                 <div style="order:1"><img src="{thumbnail}" style="width:150px; height:150px;"></div>\
@@ -154,17 +145,14 @@ async def create_checkout_session(
     org_id = CheckoutModel.org_id
     org_name = CheckoutModel.org_name
     print(org_name)
+    # every image of the cart is uploaded at once, instead of one after another per item
+    uploads = checkout_image_uploads(CheckoutModel.products)
+    await processAndSaveImages(uploads)
+    uploaded_thumbnails = {img_id for _, img_id, bucket, _ in uploads if bucket == CART_THUMBNAIL_BUCKET}
     for item in CheckoutModel.products:
-        img_id = item.img_id
         thumbnail = item.thumbnail
-        thumbnail_img_id = "t_" + img_id
-        if thumbnail and thumbnail.startswith("data:image"):
-            processAndSaveImage(thumbnail, thumbnail_img_id, "thumbnails-cart")
-            item.thumbnail = thumbnail_img_id
-            thumbnail = generate_presigned_url(thumbnail_img_id, "thumbnails-cart")
-        if item.toggled and isinstance(item.toggled, str) and item.toggled.startswith("data:image"):
-            processAndSaveImage(item.toggled, f"e_{item.img_id}", "browse-image-v2")
-            item.toggled = True
+        if thumbnail in uploaded_thumbnails:
+            thumbnail = image_url(thumbnail, "thumbnails-cart")
         
         color = await capitalize_first_letter(item.color)
         apparel = await capitalize_first_letter(item.apparel)
@@ -330,7 +318,7 @@ async def stripe_webhook(
         items = order_model.item
         for item in items:
             thumbnail_img_id = "t_" + item.img_id
-            thumbnail = generate_presigned_url(thumbnail_img_id, "thumbnails-cart")
+            thumbnail = image_url(thumbnail_img_id, "thumbnails-cart")
 
             message_body += f'<div style="display:flex">\
                 <div style="order:1"><img src="{thumbnail}" style="width:150px; height:150px;"></div>\
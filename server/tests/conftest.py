@@ -0,0 +1,56 @@
+import os
+import shutil
+import socket
+import subprocess
+import tempfile
+import time
+import pytest
+
+
+@pytest.fixture
+def anyio_backend():
+    # async tests run on anyio's pytest plugin (anyio ships with fastapi), on asyncio like the app
+    return "asyncio"
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def _wait_for_port(port: int, timeout: float = 5.0) -> bool:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            with socket.create_connection(("127.0.0.1", port), timeout=0.2):
+                return True
+        except OSError:
+            time.sleep(0.05)
+    return False
+
+
+@pytest.fixture(scope="session")
+def redis_url():
+    """REDIS_TEST_URL if set, otherwise a throwaway redis-server (REDIS_SERVER_BIN or the one on
+    PATH) started for the session. Tests needing Redis are skipped when neither is available."""
+    if os.environ.get("REDIS_TEST_URL"):
+        yield os.environ["REDIS_TEST_URL"]
+        return
+    server_bin = os.environ.get("REDIS_SERVER_BIN") or shutil.which("redis-server")
+    if not server_bin:
+        pytest.skip("no Redis: set REDIS_TEST_URL or put redis-server on PATH")
+    port = _free_port()
+    with tempfile.TemporaryDirectory() as data_dir:
+        server = subprocess.Popen(
+            [server_bin, "--port", str(port), "--bind", "127.0.0.1", "--dir", data_dir, "--save", "", "--appendonly", "no"],
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL,
+        )
+        try:
+            if not _wait_for_port(port):
+                pytest.skip(f"{server_bin} did not start")
+            yield f"redis://127.0.0.1:{port}/0"
+        finally:
+            server.terminate()
+            server.wait()
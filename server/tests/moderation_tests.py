@@ -0,0 +1,54 @@
+import asyncio
+import pytest
+from profanity_check import predict
+
+from utils.moderation import ProfanityScreener
+
+PROMPTS = [
+    "a cat wearing a space suit",
+    "sunset over the mountains, watercolor",
+    "fuck this shit",
+    "you stupid bitch",
+    "a logo for a coffee shop",
+    "damn",
+]
+
+
+@pytest.mark.anyio
+async def test_batched_verdicts_match_predict():
+    screener = ProfanityScreener()
+    verdicts = await asyncio.gather(*(screener.is_profane(prompt) for prompt in PROMPTS))
+    assert verdicts == [bool(flag) for flag in predict(PROMPTS)]
+    assert screener.stats()["batches"] == 1
+
+
+@pytest.mark.anyio
+async def test_repeated_prompts_are_served_from_the_cache():
+    screener = ProfanityScreener()
+    first = await screener.is_profane(PROMPTS[2])
+    second = await screener.is_profane(PROMPTS[2])
+    assert first == second == bool(predict([PROMPTS[2]])[0])
+    assert screener.stats()["cache_hits"] == 1
+    assert screener.stats()["batches"] == 1
+
+
+@pytest.mark.anyio
+async def test_concurrent_duplicates_share_one_score():
+    screener = ProfanityScreener()
+    verdicts = await asyncio.gather(*(screener.is_profane(PROMPTS[0]) for _ in range(5)))
+    assert verdicts == [bool(predict([PROMPTS[0]])[0])] * 5
+    assert screener.stats()["batched_prompts"] == 1
+
+
+@pytest.mark.anyio
+async def test_a_failed_batch_fails_every_waiter(monkeypatch):
+    def broken_predict_prob(prompts):
+        raise RuntimeError("model not loaded")
+
+    monkeypatch.setattr("utils.moderation.predict_prob", broken_predict_prob)
+    screener = ProfanityScreener()
+    results = await asyncio.gather(*(screener.is_profane(prompt) for prompt in PROMPTS[:3]), return_exceptions=True)
+    assert all(isinstance(result, RuntimeError) for result in results)
+    # the done callback that drops the batch task runs on the next loop iteration
+    await asyncio.sleep(0)
+    assert not screener._batch_tasks
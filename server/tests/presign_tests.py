@@ -0,0 +1,69 @@
+import pytest
+
+import aws_utils.presign as presign
+from aws_utils.presign import PresignedUrlCache, PRESIGNED_URL_EXPIRATION, PRESIGNED_URL_MIN_REMAINING
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(presign.time, "monotonic", clock)
+    return clock
+
+
+@pytest.fixture
+def signed(monkeypatch):
+    signed = []
+
+    def sign_url(bucket_name, object_name, expiration):
+        signed.append(object_name)
+        return f"https://{bucket_name}/{object_name}?signature={len(signed)}"
+
+    monkeypatch.setattr(presign, "sign_url", sign_url)
+    return signed
+
+
+def test_urls_are_reused_while_valid_long_enough(clock, signed):
+    cache = PresignedUrlCache()
+    url = cache.get("bucket", "img")
+    clock.now += PRESIGNED_URL_EXPIRATION - PRESIGNED_URL_MIN_REMAINING
+    assert cache.get("bucket", "img") == url
+    assert signed == ["img"]
+    assert cache.stats()["hits"] == 1
+
+
+def test_urls_are_signed_again_close_to_expiry(clock, signed):
+    cache = PresignedUrlCache()
+    url = cache.get("bucket", "img")
+    clock.now += PRESIGNED_URL_EXPIRATION - PRESIGNED_URL_MIN_REMAINING + 1
+    assert cache.get("bucket", "img") != url
+    assert signed == ["img", "img"]
+
+
+def test_get_many_only_signs_the_missing_urls(clock, signed):
+    cache = PresignedUrlCache()
+    cache.get("bucket", "a")
+    urls = cache.get_many("bucket", ["a", "b", "b"])
+    assert list(urls) == ["a", "b"]
+    assert signed == ["a", "b"]
+
+
+def test_least_recently_used_url_is_evicted(clock, signed):
+    cache = PresignedUrlCache(max_size=2)
+    cache.get("bucket", "a")
+    cache.get("bucket", "b")
+    cache.get("bucket", "a")  # b is now the least recently used
+    cache.get("bucket", "c")
+    assert cache.stats()["size"] == 2
+
+    cache.get("bucket", "a")
+    cache.get("bucket", "b")
+    assert signed == ["a", "b", "c", "b"]
@@ -0,0 +1,100 @@
+import pytest
+from botocore.exceptions import ClientError
+from fastapi import HTTPException
+
+import ai_models.router as provider_router
+from ai_models.router import ProviderHealth, ProviderRouter, is_provider_failure
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(provider_router.time, "monotonic", clock)
+    return clock
+
+
+def bedrock_error(code, status):
+    return ClientError({"Error": {"Code": code}, "ResponseMetadata": {"HTTPStatusCode": status}}, "InvokeModel")
+
+
+def raised_by_generator(error):
+    """The generators re-raise provider errors as an HTTPException."""
+    try:
+        try:
+            raise error
+        except Exception:
+            raise HTTPException(status_code=500)
+    except HTTPException as http_exc:
+        return http_exc
+
+
+def test_breaker_opens_after_consecutive_failures(clock):
+    health = ProviderHealth("titan")
+    for _ in range(provider_router.PROVIDER_BREAKER_FAILURES - 1):
+        health.record(1.0, False)
+    assert health.available()
+    health.record(1.0, False)
+    assert not health.available()
+    assert health.stats()["breaker"] == "open"
+
+
+def test_breaker_half_opens_after_the_cooldown(clock):
+    health = ProviderHealth("titan")
+    for _ in range(provider_router.PROVIDER_BREAKER_FAILURES):
+        health.record(1.0, False)
+    clock.now += provider_router.PROVIDER_BREAKER_COOLDOWN
+    assert health.available()
+    assert health.stats()["breaker"] == "half-open"
+
+    # one probe goes through, the next one waits another cooldown
+    health.probing()
+    assert not health.available()
+
+
+def test_breaker_closes_on_success_and_forgets_the_failures(clock):
+    health = ProviderHealth("titan")
+    for _ in range(provider_router.PROVIDER_MIN_SAMPLES):
+        health.record(1.0, False)
+    clock.now += provider_router.PROVIDER_BREAKER_COOLDOWN
+    health.record(1.0, True)
+    assert health.stats()["breaker"] == "closed"
+
+    # a single failure after recovering does not reopen it
+    health.record(1.0, False)
+    assert health.available()
+    assert health.stats()["breaker"] == "closed"
+
+
+def test_router_leaves_out_open_breakers(clock):
+    router = ProviderRouter(["titan", "openai"])
+    for _ in range(provider_router.PROVIDER_BREAKER_FAILURES):
+        router.record("titan", 1.0, False)
+    assert router.choose(2) == ["openai"]
+
+
+def test_router_hands_out_a_single_half_open_probe(clock):
+    router = ProviderRouter(["titan", "openai"])
+    for _ in range(provider_router.PROVIDER_BREAKER_FAILURES):
+        router.record("titan", 1.0, False)
+    clock.now += provider_router.PROVIDER_BREAKER_COOLDOWN
+    assert "titan" in router.choose(2)
+    assert router.choose(2) == ["openai"]
+    assert router.choose(2) == ["openai"]
+
+    router.record("titan", 1.0, True)
+    assert "titan" in router.choose(2)
+
+
+def test_request_rejections_are_not_provider_failures():
+    assert not is_provider_failure(raised_by_generator(bedrock_error("ValidationException", 400)))
+    assert is_provider_failure(raised_by_generator(bedrock_error("ThrottlingException", 400)))
+    assert is_provider_failure(raised_by_generator(bedrock_error("InternalServerException", 500)))
+    assert is_provider_failure(RuntimeError("timeout"))
@@ -0,0 +1,91 @@
+import asyncio
+import pytest
+
+from ai_models.scheduler import ProviderScheduler
+
+
+async def hold_slot(scheduler, started, release, name):
+    async with scheduler.slot():
+        started.append(name)
+        await release.wait()
+
+
+@pytest.mark.anyio
+async def test_calls_beyond_the_cap_wait_in_fifo_order():
+    scheduler = ProviderScheduler("test", max_in_flight=1)
+    started, release = [], asyncio.Event()
+    tasks = [asyncio.create_task(hold_slot(scheduler, started, release, name)) for name in "abc"]
+    await asyncio.sleep(0)
+    assert started == ["a"]
+    assert scheduler.stats()["queue_depth"] == 2
+
+    release.set()
+    await asyncio.gather(*tasks)
+    assert started == ["a", "b", "c"]
+    assert scheduler.in_flight == 0
+    assert scheduler.stats()["started"] == 3
+
+
+@pytest.mark.anyio
+async def test_release_hands_the_slot_over():
+    scheduler = ProviderScheduler("test", max_in_flight=1)
+    started, release = [], asyncio.Event()
+    first = asyncio.create_task(hold_slot(scheduler, started, release, "a"))
+    second = asyncio.create_task(hold_slot(scheduler, started, asyncio.Event(), "b"))
+    await asyncio.sleep(0)
+
+    release.set()
+    await first
+    await asyncio.sleep(0)
+    # the slot went straight to the waiter, it was never free for a newcomer
+    assert started == ["a", "b"]
+    assert scheduler.in_flight == 1
+    second.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await second
+    assert scheduler.in_flight == 0
+
+
+@pytest.mark.anyio
+async def test_cancelled_waiter_leaves_the_queue():
+    scheduler = ProviderScheduler("test", max_in_flight=1)
+    started, release = [], asyncio.Event()
+    first = asyncio.create_task(hold_slot(scheduler, started, release, "a"))
+    waiting = asyncio.create_task(hold_slot(scheduler, started, release, "b"))
+    await asyncio.sleep(0)
+    assert scheduler.stats()["queue_depth"] == 1
+
+    waiting.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await waiting
+    assert scheduler.stats()["queue_depth"] == 0
+
+    release.set()
+    await first
+    assert started == ["a"]
+    assert scheduler.in_flight == 0
+
+
+@pytest.mark.anyio
+async def test_waiter_cancelled_after_the_handoff_passes_the_slot_on():
+    scheduler = ProviderScheduler("test", max_in_flight=1)
+    started, release = [], asyncio.Event()
+    first = asyncio.create_task(hold_slot(scheduler, started, release, "a"))
+    second = asyncio.create_task(hold_slot(scheduler, started, release, "b"))
+    third = asyncio.create_task(hold_slot(scheduler, started, release, "c"))
+    await asyncio.sleep(0)
+
+    release.set()
+    await asyncio.sleep(0)  # a finishes and hands the slot to b, which has not run yet
+    assert first.done() and started == ["a"]
+    second.cancel()
+    await asyncio.gather(second, third, return_exceptions=True)
+    assert started == ["a", "c"]
+    assert scheduler.in_flight == 0
+
+
+@pytest.mark.anyio
+async def test_run_uses_the_provider_executor():
+    scheduler = ProviderScheduler("test", max_in_flight=2)
+    assert await scheduler.run(lambda x: x * 2, 21) == 42
+    assert scheduler.in_flight == 0
@@ -0,0 +1,101 @@
+import uuid
+import aioredis
+import pytest
+
+import redis as redis_module
+from utils.task_store import (
+    create_task,
+    get_task,
+    get_image_status,
+    update_task,
+    set_image_result,
+    replace_image_status,
+    finish_slot,
+    delete_task,
+)
+
+@pytest.fixture
+async def redis(redis_url, monkeypatch):
+    # the tests only touch their own task keys
+    try:
+        pool = await aioredis.create_redis_pool(redis_url, encoding="utf-8")
+    except (OSError, aioredis.RedisError):
+        pytest.skip(f"no Redis at {redis_url}")
+    monkeypatch.setattr(redis_module, "redis", pool)
+    yield pool
+    pool.close()
+    await pool.wait_closed()
+
+
+@pytest.fixture
+async def task(redis):
+    user_id, task_id = "test_user", str(uuid.uuid4())
+    await create_task(user_id, task_id, {
+        "status": "processing",
+        "prompts": ["a", "b", "c"],
+        "image_status": {str(i): "processing" for i in range(6)},
+    }, ttl=60)
+    yield user_id, task_id
+    await delete_task(user_id, task_id)
+
+
+@pytest.mark.anyio
+async def test_create_and_get_task(task):
+    task_info = await get_task(*task)
+    assert task_info["status"] == "processing"
+    assert task_info["prompts"] == ["a", "b", "c"]
+    assert task_info["image_status"] == {str(i): "processing" for i in range(6)}
+
+
+@pytest.mark.anyio
+async def test_set_if_exists_updates_a_live_task(task):
+    assert await update_task(*task, status="failed")
+    assert await set_image_result(*task, 0, "completed", "1.50")
+    task_info = await get_task(*task)
+    assert task_info["status"] == "failed"
+    assert task_info["image_status"]["0"] == "completed"
+    assert task_info["time_taken"]["0"] == "1.50"
+
+
+@pytest.mark.anyio
+async def test_set_if_exists_does_not_recreate_a_deleted_task(task):
+    await delete_task(*task)
+    assert not await set_image_result(*task, 0, "completed", "1.50")
+    assert await get_task(*task) is None
+
+
+@pytest.mark.anyio
+async def test_compare_and_set_only_replaces_the_expected_status(task):
+    await set_image_result(*task, 0, "completed")
+    assert await replace_image_status(*task, (0, 3), "processing", "cancelled") == 1
+    image_status = (await get_task(*task))["image_status"]
+    assert image_status["0"] == "completed"
+    assert image_status["3"] == "cancelled"
+    assert await replace_image_status(*task, (0, 3), "processing", "cancelled") == 0
+
+
+@pytest.mark.anyio
+async def test_finish_slot_settles_the_task_on_the_last_slot(task):
+    assert await finish_slot(*task, 3, "9.00") == 1
+    assert await finish_slot(*task, 3, "9.00") == 1
+    assert (await get_task(*task))["status"] == "processing"
+    assert await finish_slot(*task, 3, "9.00") == 2
+    task_info = await get_task(*task)
+    assert task_info["status"] == "completed"
+    assert task_info["total_time_taken"] == "9.00"
+
+
+@pytest.mark.anyio
+async def test_finish_slot_on_a_deleted_task(task):
+    await delete_task(*task)
+    assert await finish_slot(*task, 3, "9.00") == 0
+    assert await get_task(*task) is None
+
+
+@pytest.mark.anyio
+async def test_get_image_status(task):
+    await set_image_result(*task, 0, "cancelled")
+    assert await get_image_status(*task, 0) == "cancelled"
+    assert await get_image_status(*task, 1) == "processing"
+    await delete_task(*task)
+    assert await get_image_status(*task, 0) is None
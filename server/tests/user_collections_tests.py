@@ -0,0 +1,78 @@
+import pytest
+from bson import ObjectId
+
+from database.user_collections import find_all, find_page
+
+
+class MockCursor:
+    def __init__(self, documents, projection):
+        self.documents = documents
+        self.projection = projection
+
+    def sort(self, field, direction):
+        self.documents = sorted(self.documents, key=lambda document: document[field], reverse=direction < 0)
+        return self
+
+    def limit(self, count):
+        self.documents = self.documents[:count]
+        return self
+
+    async def to_list(self, length=None):
+        hidden = {field for field, shown in self.projection.items() if not shown}
+        return [{k: v for k, v in document.items() if k not in hidden} for document in self.documents]
+
+
+class MockCollection:
+    """Supports the user_id equality and _id $lt filters the helpers use."""
+
+    def __init__(self, documents):
+        self.documents = documents
+
+    def find(self, query, projection):
+        documents = [document for document in self.documents if document["user_id"] == query["user_id"]]
+        if "_id" in query:
+            documents = [document for document in documents if document["_id"] < query["_id"]["$lt"]]
+        return MockCursor(documents, projection)
+
+
+@pytest.fixture
+def liked_images():
+    documents = [{"_id": ObjectId(), "user_id": "test_user", "img_id": f"img_{i}"} for i in range(7)]
+    documents.append({"_id": ObjectId(), "user_id": "other_user", "img_id": "img_other"})
+    return MockCollection(documents)
+
+
+@pytest.mark.anyio
+async def test_find_page_walks_newest_first(liked_images):
+    pages, cursor = [], None
+    while True:
+        entries, cursor = await find_page(liked_images, "test_user", cursor, limit=3)
+        pages.append([entry["img_id"] for entry in entries])
+        if cursor is None:
+            break
+    assert pages == [["img_6", "img_5", "img_4"], ["img_3", "img_2", "img_1"], ["img_0"]]
+
+
+@pytest.mark.anyio
+async def test_find_page_hides_storage_fields(liked_images):
+    entries, _ = await find_page(liked_images, "test_user", limit=1)
+    assert entries == [{"img_id": "img_6"}]
+
+
+@pytest.mark.anyio
+async def test_find_page_without_a_next_page(liked_images):
+    entries, cursor = await find_page(liked_images, "test_user", limit=7)
+    assert len(entries) == 7
+    assert cursor is None
+
+
+@pytest.mark.anyio
+async def test_find_page_rejects_an_invalid_cursor(liked_images):
+    with pytest.raises(ValueError):
+        await find_page(liked_images, "test_user", "not-an-object-id", limit=3)
+
+
+@pytest.mark.anyio
+async def test_find_all_is_oldest_first(liked_images):
+    entries = await find_all(liked_images, "test_user")
+    assert [entry["img_id"] for entry in entries] == [f"img_{i}" for i in range(7)]
@@ -0,0 +1,90 @@
+import os
+import asyncio
+import logging
+from collections import deque
+from models.AnalysisModel import AnalysisModel
+from database.AnalysisOperations import AnalysisOperations
+from db import get_database
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+ANALYSIS_FLUSH_SIZE = int(os.environ.get("ANALYSIS_FLUSH_SIZE", 100))
+ANALYSIS_FLUSH_INTERVAL = float(os.environ.get("ANALYSIS_FLUSH_INTERVAL", 5))
+# records kept while Mongo is unreachable, the oldest are dropped past this
+ANALYSIS_MAX_BUFFER = int(os.environ.get("ANALYSIS_MAX_BUFFER", 5000))
+
+
+class AnalysisSink:
+    """Buffers analysis records and writes them with insert_many once
+    ANALYSIS_FLUSH_SIZE records are waiting or every ANALYSIS_FLUSH_INTERVAL seconds."""
+
+    def __init__(self):
+        self.enabled = bool(os.environ.get("RECORD_ANALYSIS"))
+        self._buffer = deque(maxlen=ANALYSIS_MAX_BUFFER)
+        self._flush_lock = asyncio.Lock()
+        self._timer = None
+        self._size_flush = None
+        self.dropped = 0
+
+    def add(self, analysis: AnalysisModel):
+        if not self.enabled:
+            return
+        if len(self._buffer) == self._buffer.maxlen:
+            self.dropped += 1
+            logger.warning(f"Analysis buffer is full, dropping the oldest record ({self.dropped} dropped so far)")
+        self._buffer.append(analysis)
+        if len(self._buffer) >= ANALYSIS_FLUSH_SIZE and (self._size_flush is None or self._size_flush.done()):
+            self._size_flush = asyncio.create_task(self.flush())
+
+    async def flush(self):
+        async with self._flush_lock:
+            while self._buffer:
+                batch = [self._buffer.popleft() for _ in range(min(len(self._buffer), ANALYSIS_FLUSH_SIZE))]
+                if not await AnalysisOperations(get_database()).create_many(batch):
+                    # put the batch back in order and retry on the next flush. Records added in the
+                    # meantime are newer, so when they don't all fit the batch's oldest are dropped
+                    room = self._buffer.maxlen - len(self._buffer)
+                    if room < len(batch):
+                        dropped = len(batch) - room
+                        self.dropped += dropped
+                        logger.warning(f"Analysis buffer is full, dropping {dropped} records that failed to write ({self.dropped} dropped so far)")
+                        batch = batch[dropped:]
+                    self._buffer.extendleft(reversed(batch))
+                    return
+
+    async def _flush_periodically(self):
+        while True:
+            await asyncio.sleep(ANALYSIS_FLUSH_INTERVAL)
+            try:
+                await self.flush()
+            except Exception as e:
+                logger.error(f"Error flushing analysis records: {e}")
+
+    def stats(self) -> dict:
+        return {"buffered": len(self._buffer), "dropped": self.dropped}
+
+    def start(self):
+        if self.enabled and self._timer is None:
+            self._timer = asyncio.create_task(self._flush_periodically(), name="analysis-sink")
+
+    async def stop(self):
+        if self._timer:
+            self._timer.cancel()
+            self._timer = None
+        await self.flush()
+
+
+analysis_sink = AnalysisSink()
+
+
+async def start_analysis_sink():
+    analysis_sink.start()
+
+
+async def stop_analysis_sink():
+    await analysis_sink.stop()
+
+
+def get_analysis_sink_stats() -> dict:
+    return analysis_sink.stats()
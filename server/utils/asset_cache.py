@@ -0,0 +1,172 @@
+import os
+import time
+import asyncio
+import logging
+import mimetypes
+from collections import OrderedDict
+from typing import AsyncIterator, NamedTuple, Optional
+from botocore.exceptions import ClientError
+from aws_utils import get_s3_client
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+SKELETON_BUCKET = "drophouse-skeleton"
+# hot skeleton assets (masks, mockups, logos) are kept in memory up to this many bytes in total
+ASSET_CACHE_MAX_BYTES = int(os.environ.get("ASSET_CACHE_MAX_BYTES", 64 * 1024 * 1024))
+# larger objects are streamed through without being cached
+ASSET_CACHE_MAX_OBJECT_BYTES = int(os.environ.get("ASSET_CACHE_MAX_OBJECT_BYTES", 4 * 1024 * 1024))
+# assets can be replaced under the same key, so cached copies are re-read after this long
+ASSET_CACHE_TTL = int(os.environ.get("ASSET_CACHE_TTL", 300))
+ASSET_CHUNK_SIZE = 256 * 1024
+
+
+class Asset(NamedTuple):
+    content_type: str
+    etag: Optional[str]
+    last_modified: Optional[str]
+    length: Optional[int]
+    content: Optional[bytes] = None  # set when the asset is small enough to be held in memory
+    stream: Optional["BodyStream"] = None  # set otherwise, must be consumed or closed
+    not_modified: bool = False  # S3 answered a conditional read with 304, there is no body
+
+
+def _get_object(bucket_name: str, object_key: str, if_none_match: Optional[str] = None):
+    kwargs = {"IfNoneMatch": if_none_match} if if_none_match else {}
+    return get_s3_client().get_object(Bucket=bucket_name, Key=object_key, **kwargs)
+
+
+def _not_modified(error: ClientError) -> bool:
+    return error.response.get("Error", {}).get("Code") in ("304", "NotModified") or \
+        error.response.get("ResponseMetadata", {}).get("HTTPStatusCode") == 304
+
+
+def _content_type(content_type: Optional[str], object_key: str) -> str:
+    if not content_type or content_type == "binary/octet-stream":
+        return mimetypes.guess_type(object_key)[0] or "application/octet-stream"
+    return content_type
+
+
+async def _stream_body(body) -> AsyncIterator[bytes]:
+    loop = asyncio.get_running_loop()
+    try:
+        while True:
+            chunk = await loop.run_in_executor(None, body.read, ASSET_CHUNK_SIZE)
+            if not chunk:
+                break
+            yield chunk
+    finally:
+        body.close()
+
+
+class BodyStream:
+    """Async iterator over an S3 body. aclose() releases the body and its pooled connection
+    even when it was never iterated, which an unstarted generator's aclose() does not."""
+
+    def __init__(self, body):
+        self.body = body
+
+    def __aiter__(self) -> AsyncIterator[bytes]:
+        return _stream_body(self.body)
+
+    async def aclose(self):
+        self.body.close()
+
+
+class AssetCache:
+    """LRU of small S3 objects, bounded by their total size."""
+
+    def __init__(self, max_bytes: int = ASSET_CACHE_MAX_BYTES):
+        self.max_bytes = max_bytes
+        self.size = 0
+        self._assets = OrderedDict()  # (bucket, key) -> (asset, expires_at)
+        self.hits = 0
+        self.misses = 0
+
+    def _lookup(self, cache_key) -> Optional[Asset]:
+        cached = self._assets.get(cache_key)
+        if cached is None:
+            return None
+        asset, expires_at = cached
+        if expires_at <= time.monotonic():
+            self._evict(cache_key)
+            return None
+        self._assets.move_to_end(cache_key)
+        return asset
+
+    def _evict(self, cache_key):
+        asset, _ = self._assets.pop(cache_key)
+        self.size -= len(asset.content)
+
+    def _store(self, cache_key, asset: Asset):
+        if cache_key in self._assets:
+            self._evict(cache_key)
+        self._assets[cache_key] = (asset, time.monotonic() + ASSET_CACHE_TTL)
+        self.size += len(asset.content)
+        while self.size > self.max_bytes:
+            self._evict(next(iter(self._assets)))
+
+    async def get(self, bucket_name: str, object_key: str, if_none_match: Optional[str] = None) -> Asset:
+        """The asset from memory, or from S3 on a miss. Raises botocore's ClientError
+        (e.g. NoSuchKey) when S3 does. With `if_none_match` a miss is a conditional read,
+        and a not_modified Asset without a body comes back when the ETag still matches."""
+        cache_key = (bucket_name, object_key)
+        asset = self._lookup(cache_key)
+        if asset is not None:
+            self.hits += 1
+            return asset
+        self.misses += 1
+
+        loop = asyncio.get_running_loop()
+        try:
+            response = await loop.run_in_executor(None, _get_object, bucket_name, object_key, if_none_match)
+        except ClientError as e:
+            if not (if_none_match and _not_modified(e)):
+                raise
+            headers = e.response.get("ResponseMetadata", {}).get("HTTPHeaders", {})
+            return Asset(
+                content_type=_content_type(headers.get("content-type"), object_key),
+                etag=headers.get("etag", if_none_match),
+                last_modified=headers.get("last-modified"),
+                length=None,
+                not_modified=True,
+            )
+        last_modified = response.get("LastModified")
+        asset = Asset(
+            content_type=_content_type(response.get("ContentType"), object_key),
+            etag=response.get("ETag"),
+            last_modified=last_modified.strftime("%a, %d %b %Y %H:%M:%S GMT") if last_modified else None,
+            length=response.get("ContentLength"),
+        )
+        if asset.length is not None and asset.length <= ASSET_CACHE_MAX_OBJECT_BYTES:
+            content = b"".join([chunk async for chunk in _stream_body(response["Body"])])
+            asset = asset._replace(content=content)
+            self._store(cache_key, asset)
+            return asset
+        return asset._replace(stream=BodyStream(response["Body"]))
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "assets": len(self._assets),
+            "bytes": self.size,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 3) if lookups else None,
+        }
+
+
+asset_cache = AssetCache()
+
+
+async def read_asset(bucket_name: str, object_key: str) -> Asset:
+    """Like asset_cache.get, with the content always read into memory."""
+    asset = await asset_cache.get(bucket_name, object_key)
+    if asset.content is None:
+        content = b"".join([chunk async for chunk in asset.stream])
+        asset = asset._replace(content=content, stream=None)
+    return asset
+
+
+def get_asset_cache_stats() -> dict:
+    return asset_cache.stats()
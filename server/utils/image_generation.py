@@ -0,0 +1,224 @@
+import os
+import json
+import time
+import asyncio
+import logging
+from ai_models.OpenAIImageGenerator import OpenAIImageGenerator
+from ai_models.TitanImageGenerator import TitanImageGenerator
+from ai_models.StableDiffusionGenerator import StableDiffusionGenerator
+from ai_models.router import provider_router, is_provider_failure
+from utils.task_store import get_task, get_image_status, set_image_result, replace_image_status, finish_slot
+from utils.image_store import store_generated_image
+from utils.task_events import publish_task_event, publish_task_cancel, register_cancel_handler
+from redis import get_redis_database
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+task_timeout = 600
+# every task has 3 image slots, slot idx is generated by the primary as image idx
+# and by the secondary as image idx+3
+IMAGE_SLOTS = 3
+# 'parallel' runs primary and secondary for every image, 'deadline' starts the
+# secondary only when the primary fails or is still running after the deadline
+image_fallback_mode = os.environ.get("IMAGE_FALLBACK_MODE", "parallel")
+image_fallback_deadline = float(os.environ.get("IMAGE_FALLBACK_DEADLINE", 15))
+# 'inline' returns the photo as base64, 'url' uploads each image to S3 as soon as it is
+# generated and returns its img_id and url instead
+image_delivery_mode = os.environ.get("IMAGE_DELIVERY_MODE", "inline")
+# 'inline' generates in the API process, 'queue' hands every image slot to the
+# workers (worker.py) through a Redis stream
+image_generation_mode = os.environ.get("IMAGE_GENERATION_MODE", "inline")
+
+IMAGE_JOB_STREAM = "image-jobs"
+IMAGE_JOB_GROUP = "image-workers"
+IMAGE_JOB_STREAM_MAXLEN = int(os.environ.get("IMAGE_JOB_STREAM_MAXLEN", 10000))
+
+IMAGE_GENERATORS = {
+    "titan": TitanImageGenerator,
+    "openai": OpenAIImageGenerator,
+    "stable-diffusion": StableDiffusionGenerator,
+}
+
+
+def generator_name(ai_model) -> str:
+    return next(name for name, class_type in IMAGE_GENERATORS.items() if isinstance(ai_model, class_type))
+
+
+def choose_generators():
+    """Primary and secondary for one image slot, picked by the provider router. Either is None
+    when not enough providers have a closed or half-open breaker."""
+    generators = [IMAGE_GENERATORS[name]() for name in provider_router.choose(2)]
+    if len(generators) < 2:
+        logger.warning(f"Only {len(generators)} image provider(s) available, the others have an open circuit breaker")
+    return generators + [None] * (2 - len(generators))
+
+
+async def set_redis_images(user_id, task_id, index, image_bytes, model):
+    return await store_generated_image(user_id, task_id, index, image_bytes, model, ttl=task_timeout, upload=image_delivery_mode == "url")
+
+async def task_callback(user_id, task_id, index, isFailed, duration, image=None, model=None):
+    logger.info(f"Image Generation index: [{index}], took -> {duration.total_seconds():.2f} seconds")
+
+    # the image is stored before its status flips so readers never see 'completed' without it
+    if image is not None and model is not None:
+        # the task is deleted once its first image is served, and images can be cancelled,
+        # so check before compressing, storing and uploading an image nobody will read
+        current_status = await get_image_status(user_id, task_id, index)
+        if current_status != 'processing':
+            logger.info(f"Image Generation index: [{index}] is no longer wanted ({current_status or 'task gone'}), dropping it")
+            return
+        await set_redis_images(user_id, task_id, index, image, model)
+
+    status = 'completed' if not isFailed else 'failed'
+    if await set_image_result(user_id, task_id, index, status, f"{duration.total_seconds():.2f}"):
+        await publish_task_event(user_id, task_id, index)
+
+async def call_provider(ai_model, idx, prompt, user_id, task_id):
+    """Runs one provider call and feeds its outcome to the provider router. Cancelled calls and
+    rejected requests (see is_provider_failure) are not counted. Without a provider (every
+    other breaker is open) the image fails right away."""
+    if ai_model is None:
+        await set_image_status(user_id, task_id, idx, 'failed')
+        return None
+    name = generator_name(ai_model)
+    failed_after = None
+
+    async def callback(user_id, task_id, index, isFailed, duration, image=None, model=None):
+        nonlocal failed_after
+        if isFailed:
+            failed_after = duration.total_seconds()  # recorded below, once the error is known
+        else:
+            provider_router.record(name, duration.total_seconds(), True)
+        await task_callback(user_id, task_id, index, isFailed, duration, image, model)
+
+    try:
+        result = await ai_model.generate_single_image(idx, prompt, callback, user_id, task_id)
+    except Exception as e:
+        if failed_after is not None and is_provider_failure(e):
+            provider_router.record(name, failed_after, False)
+        raise
+    if failed_after is not None:
+        # the generator reported a failure without raising, there is no error to classify
+        provider_router.record(name, failed_after, False)
+    return result
+
+async def set_image_status(user_id, task_id, index, status):
+    if await set_image_result(user_id, task_id, index, status):
+        await publish_task_event(user_id, task_id, index)
+
+# (task_id, idx) -> running generations for that image slot, primary and secondary
+generation_tasks = {}
+# keeps the slot tasks alive until they settle, the event loop only holds weak references
+_slot_tasks = set()
+
+def cancel_local_generation(user_id, task_id, idx):
+    for task in generation_tasks.pop((task_id, idx), ()):
+        task.cancel()
+
+register_cancel_handler(cancel_local_generation)
+
+async def cancel_generation(user_id, task_id, idx):
+    """Stops whatever is still generating image `idx` (on any node) and marks it cancelled."""
+    await publish_task_cancel(user_id, task_id, idx)
+    if await replace_image_status(user_id, task_id, (idx, idx + 3), 'processing', 'cancelled'):
+        await publish_task_event(user_id, task_id, idx)
+
+async def generate_with_fallback(idx, prompt, ai_model_primary, ai_model_secondary, user_id, task_id):
+    """Starts the secondary provider for `idx` only if the primary fails or misses the deadline."""
+    primary = asyncio.create_task(call_provider(ai_model_primary, idx, prompt, user_id, task_id))
+    try:
+        await asyncio.wait({primary}, timeout=image_fallback_deadline)
+        if primary.done():
+            task_info = await get_task(user_id, task_id)
+            if not task_info:
+                return await primary # task expired or was already served
+            if task_info['image_status'].get(str(idx)) == 'completed':
+                await set_image_status(user_id, task_id, idx + 3, 'skipped')
+                return await primary
+        else:
+            logger.info(f"Image Generation index: [{idx}] missed the {image_fallback_deadline}s deadline, starting fallback")
+
+        secondary = call_provider(ai_model_secondary, idx + 3, prompt, user_id, task_id)
+        return await asyncio.gather(primary, secondary, return_exceptions=True)
+    except asyncio.CancelledError:
+        primary.cancel()
+        raise
+
+async def generate_image_slot(idx, prompt, ai_model_primary, ai_model_secondary, user_id, task_id):
+    """Generates image slot `idx` with the primary as image `idx` and the secondary as `idx+3`."""
+    if image_fallback_mode == "deadline":
+        return await generate_with_fallback(idx, prompt, ai_model_primary, ai_model_secondary, user_id, task_id)
+    return await asyncio.gather(
+        call_provider(ai_model_primary, idx, prompt, user_id, task_id),
+        call_provider(ai_model_secondary, idx + 3, prompt, user_id, task_id),
+        return_exceptions=True
+    )
+
+def run_image_slot(idx, prompt, ai_model_primary, ai_model_secondary, user_id, task_id, created_at):
+    """Starts image slot `idx` in this process, the returned task settles once the slot is finished."""
+    generation = asyncio.create_task(generate_image_slot(idx, prompt, ai_model_primary, ai_model_secondary, user_id, task_id))
+    # registered right away so a cancel arriving before the slot runs still reaches it
+    generation_tasks.setdefault((task_id, idx), set()).add(generation)
+    return asyncio.create_task(finish_image_slot(generation, idx, user_id, task_id, created_at), name=f"image-gen-{task_id}-{idx}")
+
+async def finish_image_slot(generation, idx, user_id, task_id, created_at):
+    try:
+        done, pending = await asyncio.wait({generation}, timeout=task_timeout)
+        if pending:
+            logger.warning(f"Image generation [{idx}] for task {task_id} exceeded {task_timeout}s, cancelling")
+            generation.cancel()
+        elif not generation.cancelled():
+            generation.exception() # failures are already recorded by task_callback
+    finally:
+        running = generation_tasks.get((task_id, idx))
+        if running is not None:
+            running.discard(generation)
+            if not running:
+                del generation_tasks[(task_id, idx)]
+
+    total_time_taken = time.time() - created_at
+    if await finish_slot(user_id, task_id, IMAGE_SLOTS, f"{total_time_taken:.2f}") == 2:
+        logger.info(f"Success - Total image Generation took -> {total_time_taken:.2f} seconds")
+        await publish_task_event(user_id, task_id)
+
+async def enqueue_image_job(idx, prompt, user_id, task_id, created_at):
+    # providers are picked by the worker, which is where their latencies are observed
+    job = {
+        "user_id": user_id,
+        "task_id": task_id,
+        "idx": idx,
+        "prompt": prompt,
+        "created_at": created_at,
+    }
+    try:
+        redis = get_redis_database()
+        await redis.xadd(IMAGE_JOB_STREAM, {"job": json.dumps(job)}, max_len=IMAGE_JOB_STREAM_MAXLEN)
+    except Exception as e:
+        logger.error(f"Redis - enqueueing image job [{idx}] for task {task_id} failed: {e}")
+        await replace_image_status(user_id, task_id, (idx, idx + 3), 'processing', 'failed')
+        await finish_slot(user_id, task_id, IMAGE_SLOTS, f"{time.time() - created_at:.2f}")
+        await publish_task_event(user_id, task_id, idx)
+
+def start_image_slot(idx, prompt, user_id, task_id, created_at):
+    """Starts image slot `idx` here or on a worker, depending on IMAGE_GENERATION_MODE."""
+    if image_generation_mode == "queue":
+        task = asyncio.create_task(enqueue_image_job(idx, prompt, user_id, task_id, created_at))
+    else:
+        ai_model_primary, ai_model_secondary = choose_generators()
+        task = run_image_slot(idx, prompt, ai_model_primary, ai_model_secondary, user_id, task_id, created_at)
+    _slot_tasks.add(task)
+    task.add_done_callback(_slot_tasks.discard)
+
+async def run_image_job(job: dict):
+    """Runs one queued image slot to completion, skipping slots that are no longer wanted."""
+    user_id, task_id, idx = job["user_id"], job["task_id"], int(job["idx"])
+    task_info = await get_task(user_id, task_id)
+    if not task_info:
+        logger.info(f"Skipping image job [{idx}] for task {task_id}, the task expired or was served")
+        return
+    if 'processing' not in (task_info['image_status'].get(str(idx)), task_info['image_status'].get(str(idx + 3))):
+        logger.info(f"Skipping image job [{idx}] for task {task_id}, it already ran")
+        return
+    ai_model_primary, ai_model_secondary = choose_generators()
+    await run_image_slot(idx, job["prompt"], ai_model_primary, ai_model_secondary, user_id, task_id, job["created_at"])
@@ -0,0 +1,159 @@
+import io
+import os
+import time
+import base64
+import asyncio
+import logging
+from typing import NamedTuple, Optional
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from PIL import Image
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# decoding and encoding are CPU bound and mostly hold the GIL, so they run in worker
+# processes instead of the event loop or its thread pool
+IMAGE_PIPELINE_WORKERS = int(os.environ.get("IMAGE_PIPELINE_WORKERS", min(4, os.cpu_count() or 1)))
+# also write a WebP next to every uploaded JPEG, e.g. {img_id}.webp
+IMAGE_WEBP_RENDITIONS = os.environ.get("IMAGE_WEBP_RENDITIONS", "").lower() in ("1", "true", "yes")
+
+
+class Rendition(NamedTuple):
+    name: str
+    format: str
+    quality: int
+    max_size: Optional[int] = None  # longest side in pixels, None keeps the original size
+
+    @property
+    def extension(self) -> str:
+        return "jpg" if self.format == "JPEG" else self.format.lower()
+
+    @property
+    def content_type(self) -> str:
+        return f"image/{self.format.lower()}"
+
+
+FULL = Rendition("full", "JPEG", 85)
+
+
+def upload_renditions(rendition: Rendition = FULL) -> tuple:
+    """The rendition plus, with IMAGE_WEBP_RENDITIONS, a WebP of the same size."""
+    if not IMAGE_WEBP_RENDITIONS:
+        return (rendition,)
+    return (rendition, Rendition(f"{rendition.name}_webp", "WEBP", 80, rendition.max_size))
+
+
+def decode_data_url(image_data: str) -> bytes:
+    """Bytes of a base64 image, with or without its 'data:image/...;base64,' prefix."""
+    if image_data.startswith("data:"):
+        image_data = image_data.split(",", 1)[1]
+    return base64.b64decode(image_data)
+
+
+def _flatten(image: Image.Image) -> Image.Image:
+    """RGB copy of the image, transparent areas become white."""
+    if image.mode == "P":
+        image = image.convert("RGBA")
+    if image.mode in ("RGBA", "LA"):
+        background = Image.new("RGB", image.size, (255, 255, 255))
+        background.paste(image, mask=image.getchannel("A"))
+        return background
+    return image.convert("RGB") if image.mode != "RGB" else image
+
+
+def transcode(image_bytes: bytes, renditions: tuple) -> tuple:
+    """Decodes the image once and encodes every rendition from it. Runs in a pool process,
+    returns ({rendition name: bytes}, {stage: seconds})."""
+    timings = {}
+    started = time.perf_counter()
+    image = Image.open(io.BytesIO(image_bytes))
+    if all(rendition.max_size for rendition in renditions):
+        # JPEGs are decoded straight at 1/2, 1/4 or 1/8 scale when nothing needs full size
+        largest = max(rendition.max_size for rendition in renditions)
+        image.draft("RGB", (largest, largest))
+    image.load()
+    timings["decode"] = time.perf_counter() - started
+
+    started = time.perf_counter()
+    image = _flatten(image)
+    timings["flatten"] = time.perf_counter() - started
+
+    outputs = {}
+    for rendition in renditions:
+        started = time.perf_counter()
+        output = image
+        if rendition.max_size and max(image.size) > rendition.max_size:
+            output = image.copy()
+            output.thumbnail((rendition.max_size, rendition.max_size), Image.LANCZOS)
+        buffered = io.BytesIO()
+        output.save(buffered, format=rendition.format, quality=rendition.quality)
+        outputs[rendition.name] = buffered.getvalue()
+        timings[f"encode_{rendition.name}"] = time.perf_counter() - started
+    return outputs, timings
+
+
+_pool = None
+_stats = {"images": 0, "failed": 0, "stages": {}}  # stage -> [runs, seconds]
+
+
+def get_image_pool() -> ProcessPoolExecutor:
+    global _pool
+    if _pool is None:
+        _pool = ProcessPoolExecutor(max_workers=IMAGE_PIPELINE_WORKERS)
+    return _pool
+
+
+async def transcode_image(image_bytes: bytes, renditions: tuple = (FULL,)) -> tuple:
+    """Runs `transcode` on the process pool. Timings also include 'queued', the time spent
+    waiting for a free process, and 'total'."""
+    loop = asyncio.get_running_loop()
+    started = time.perf_counter()
+    try:
+        outputs, timings = await loop.run_in_executor(get_image_pool(), transcode, image_bytes, tuple(renditions))
+    except BrokenProcessPool:
+        # a worker died (e.g. killed for memory), the pool refuses all work from then on
+        logger.error("Image pipeline pool is broken, starting a new one")
+        _reset_pool()
+        _stats["failed"] += 1
+        raise
+    except Exception:
+        _stats["failed"] += 1
+        raise
+    timings["total"] = time.perf_counter() - started
+    timings["queued"] = max(0.0, timings["total"] - sum(seconds for stage, seconds in timings.items() if stage != "total"))
+    _stats["images"] += 1
+    for stage, seconds in timings.items():
+        totals = _stats["stages"].setdefault(stage, [0, 0.0])
+        totals[0] += 1
+        totals[1] += seconds
+    logger.debug(f"Transcoded {len(image_bytes)} bytes into {', '.join(outputs)} in {timings['total']:.3f}s: {timings}")
+    return outputs, timings
+
+
+def get_pipeline_stats() -> dict:
+    """Images transcoded so far and the average seconds spent in each stage."""
+    return {
+        "images": _stats["images"],
+        "failed": _stats["failed"],
+        "workers": IMAGE_PIPELINE_WORKERS,
+        "avg_seconds": {stage: round(seconds / runs, 4) for stage, (runs, seconds) in _stats["stages"].items()},
+    }
+
+
+async def start_image_pipeline():
+    # forks the workers at startup, before the process has started other threads
+    pool = get_image_pool()
+    loop = asyncio.get_running_loop()
+    await asyncio.gather(*(loop.run_in_executor(pool, time.sleep, 0) for _ in range(IMAGE_PIPELINE_WORKERS)))
+
+
+def _reset_pool(wait: bool = False):
+    global _pool
+    if _pool is not None:
+        _pool.shutdown(wait=wait, cancel_futures=True)
+        _pool = None
+
+
+async def stop_image_pipeline():
+    _reset_pool(wait=True)
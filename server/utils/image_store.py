@@ -0,0 +1,87 @@
+import os
+import json
+import uuid
+import logging
+from redis import get_redis_database
+from aws_utils import run_upload, gather_uploads
+from utils.record_images import upload_browse_image
+from utils.image_pipeline import Rendition, transcode_image, upload_renditions
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Generated images are kept as compressed bytes (not base64 PNG) for the lifetime of the task.
+# The inline photo of /get_image is these bytes, so clients see a JPEG unless this is set to PNG.
+GENERATED_IMAGE_FORMAT = os.environ.get("GENERATED_IMAGE_FORMAT", "JPEG").upper()
+GENERATED_IMAGE_QUALITY = int(os.environ.get("GENERATED_IMAGE_QUALITY", 90))
+MAX_IMAGES_PER_TASK = 6
+BROWSE_IMAGE_QUALITY = 85  # same as the uploads done by record_prompt_and_image
+
+
+def images_key(user_id: str, task_id: str) -> str:
+    return f"user:{user_id}:tasks:{task_id}:images"
+
+
+def image_blob_key(user_id: str, task_id: str, index) -> str:
+    return f"{images_key(user_id, task_id)}:{index}"
+
+
+GENERATED = Rendition("generated", GENERATED_IMAGE_FORMAT, GENERATED_IMAGE_QUALITY)
+BROWSE = Rendition("browse", "JPEG", BROWSE_IMAGE_QUALITY)
+
+
+async def store_generated_image(user_id: str, task_id: str, index, image_bytes: bytes, model: str, ttl: int, upload: bool = False):
+    """Compresses and stores a generated image. With `upload` the image is also pushed to the
+    browse bucket right away, as a JPEG shared with Redis so it is only transcoded once."""
+    renditions = upload_renditions(BROWSE) if upload else (GENERATED,)
+    outputs, _ = await transcode_image(image_bytes, renditions)
+    compressed = outputs[renditions[0].name]
+    meta = {"index": int(index), "model": model, "format": renditions[0].format.lower(), "size": len(compressed)}
+    if upload:
+        img_id = str(uuid.uuid4())
+        try:
+            await gather_uploads(*(
+                run_upload(upload_browse_image, outputs[rendition.name], img_id, rendition)
+                for rendition in renditions
+            ))
+            meta["img_id"] = img_id
+        except Exception as e:
+            # /get_image falls back to returning the photo inline
+            logger.error(f"S3 - uploading generated image {index} of task {task_id} failed: {e}")
+
+    redis = get_redis_database()
+    transaction = redis.multi_exec()
+    transaction.set(image_blob_key(user_id, task_id, index), compressed, expire=ttl)
+    transaction.hset(images_key(user_id, task_id), str(index), json.dumps(meta))
+    transaction.expire(images_key(user_id, task_id), ttl)
+    await transaction.execute()
+    return meta
+
+
+async def load_generated_image_meta(user_id: str, task_id: str, index):
+    """Returns the image metadata (index, model, format, size and img_id once uploaded) or None."""
+    redis = get_redis_database()
+    meta = await redis.hget(images_key(user_id, task_id), str(index))
+    return json.loads(meta) if meta else None
+
+
+async def load_generated_image(user_id: str, task_id: str, index):
+    """Returns (index, image_bytes, model) or None if the image is missing or expired."""
+    redis = get_redis_database()
+    meta = await redis.hget(images_key(user_id, task_id), str(index))
+    if not meta:
+        return None
+    image_bytes = await redis.get(image_blob_key(user_id, task_id, index), encoding=None)
+    if not image_bytes:
+        return None
+    meta = json.loads(meta)
+    return meta["index"], image_bytes, meta["model"]
+
+
+def generated_image_keys(user_id: str, task_id: str) -> list:
+    return [images_key(user_id, task_id)] + [image_blob_key(user_id, task_id, i) for i in range(MAX_IMAGES_PER_TASK)]
+
+
+async def delete_generated_images(user_id: str, task_id: str):
+    redis = get_redis_database()
+    await redis.delete(*generated_image_keys(user_id, task_id))
@@ -0,0 +1,113 @@
+import os
+import asyncio
+import logging
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from profanity_check import predict_prob
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# predict() flags a prompt when its probability is above 0.5
+PROFANITY_THRESHOLD = float(os.environ.get("PROFANITY_THRESHOLD", 0.5))
+MODERATION_BATCH_WINDOW = float(os.environ.get("MODERATION_BATCH_WINDOW_MS", 5)) / 1000
+MODERATION_MAX_BATCH = int(os.environ.get("MODERATION_MAX_BATCH", 32))
+MODERATION_CACHE_SIZE = int(os.environ.get("MODERATION_CACHE_SIZE", 10000))
+
+
+class ProfanityScreener:
+    """Scores prompts with profanity_check off the event loop.
+
+    Prompts arriving within MODERATION_BATCH_WINDOW of each other are scored
+    together with a single vectorized predict_prob call on a dedicated thread,
+    and verdicts are kept in an LRU so repeated prompts skip the model entirely.
+    """
+
+    def __init__(self):
+        # one thread: the model is CPU bound and not documented as thread-safe
+        self.executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="moderation")
+        self._pending = {}
+        self._flush_handle = None
+        # the loop only keeps weak references to tasks, so in-flight batches are held here
+        self._batch_tasks = set()
+        self._cache = OrderedDict()
+        self._stats = {"screened": 0, "cache_hits": 0, "batches": 0, "batched_prompts": 0}
+
+    async def score(self, prompt: str) -> float:
+        self._stats["screened"] += 1
+        if prompt in self._cache:
+            self._cache.move_to_end(prompt)
+            self._stats["cache_hits"] += 1
+            return self._cache[prompt]
+
+        future = self._pending.get(prompt)
+        if future is None:
+            loop = asyncio.get_running_loop()
+            future = self._pending[prompt] = loop.create_future()
+            if len(self._pending) >= MODERATION_MAX_BATCH:
+                self._flush()
+            elif self._flush_handle is None:
+                self._flush_handle = loop.call_later(MODERATION_BATCH_WINDOW, self._flush)
+        # shield so one cancelled request does not fail the others waiting on the same prompt
+        return await asyncio.shield(future)
+
+    async def is_profane(self, prompt: str) -> bool:
+        return await self.score(prompt) > PROFANITY_THRESHOLD
+
+    def _flush(self):
+        if self._flush_handle is not None:
+            self._flush_handle.cancel()
+            self._flush_handle = None
+        batch, self._pending = self._pending, {}
+        if batch:
+            task = asyncio.create_task(self._score_batch(batch))
+            self._batch_tasks.add(task)
+            task.add_done_callback(self._batch_tasks.discard)
+
+    async def _score_batch(self, batch: dict):
+        prompts = list(batch)
+        self._stats["batches"] += 1
+        self._stats["batched_prompts"] += len(prompts)
+        try:
+            loop = asyncio.get_running_loop()
+            probabilities = await loop.run_in_executor(self.executor, predict_prob, prompts)
+            for prompt, probability in zip(prompts, probabilities):
+                probability = float(probability)
+                self._cache[prompt] = probability
+                if not batch[prompt].done():
+                    batch[prompt].set_result(probability)
+            while len(self._cache) > MODERATION_CACHE_SIZE:
+                self._cache.popitem(last=False)
+        except Exception as e:
+            logger.error(f"Profanity screening failed for a batch of {len(prompts)}: {e}")
+            # every waiter gets the error instead of hanging on its future
+            for future in batch.values():
+                if not future.done():
+                    future.set_exception(e)
+
+    def stats(self) -> dict:
+        batches = self._stats["batches"]
+        return {
+            **self._stats,
+            "avg_batch_size": round(self._stats["batched_prompts"] / batches, 2) if batches else 0.0,
+            "cache_size": len(self._cache),
+        }
+
+
+_screener = None
+
+
+def get_profanity_screener() -> ProfanityScreener:
+    global _screener
+    if _screener is None:
+        _screener = ProfanityScreener()
+    return _screener
+
+
+async def is_profane(prompt: str) -> bool:
+    return await get_profanity_screener().is_profane(prompt)
+
+
+def get_profanity_stats():
+    """The screener's batch and cache counters, None until the first prompt was screened."""
+    return _screener.stats() if _screener is not None else None
@@ -0,0 +1,83 @@
+import os
+import json
+import time
+import hashlib
+import logging
+from redis import get_redis_database
+from aws_utils.presign import PRESIGNED_URL_EXPIRATION, PRESIGNED_URL_MIN_REMAINING
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# The presigned asset URLs of an org have at least this long left when it is loaded. An entry
+# (and a client copy revalidated with 304) is reused for at most half of it, so the URLs are
+# still valid for the other half whenever they are handed out.
+ORG_CACHE_MAX_TTL = min(PRESIGNED_URL_MIN_REMAINING, PRESIGNED_URL_EXPIRATION) // 2
+ORG_CACHE_TTL = min(int(os.environ.get("ORG_CACHE_TTL", ORG_CACHE_MAX_TTL)), ORG_CACHE_MAX_TTL)
+if ORG_CACHE_TTL < int(os.environ.get("ORG_CACHE_TTL", 0)):
+    logger.warning(f"ORG_CACHE_TTL is capped at {ORG_CACHE_MAX_TTL}s, half of PRESIGNED_URL_MIN_REMAINING")
+ORG_VERSION_PREFIX = "org_config_version"
+
+_stats = {"hits": 0, "misses": 0}
+
+
+def _version_key(org_id: str) -> str:
+    return f"{ORG_VERSION_PREFIX}:{org_id}"
+
+
+def org_etag(org_data: dict) -> str:
+    body = json.dumps(org_data, sort_keys=True, default=str)
+    return '"' + hashlib.sha1(body.encode("utf-8")).hexdigest() + '"'
+
+
+class OrgConfigCache:
+    """Org configs with their asset URLs already resolved, per process.
+
+    Entries carry the org's version counter from Redis, bumped by every create
+    and update, so an edit on any node invalidates the entry everywhere. They
+    also expire after ORG_CACHE_TTL, which covers Redis being unreachable.
+    """
+
+    def __init__(self):
+        self._entries = {}  # org_id -> (version, expires_at, org_data, etag)
+
+    async def _version(self, org_id: str):
+        try:
+            redis = get_redis_database()
+            return await redis.get(_version_key(org_id), encoding="utf-8")
+        except Exception as e:
+            logger.warning(f"Redis - reading org config version failed: {e}")
+            return None
+
+    async def get(self, org_id: str, load):
+        """Returns (org_data, etag), calling `load(org_id)` on a miss. Empty results are not cached."""
+        version = await self._version(org_id)
+        entry = self._entries.get(org_id)
+        if entry and entry[0] == version and entry[1] > time.monotonic():
+            _stats["hits"] += 1
+            return entry[2], entry[3]
+
+        _stats["misses"] += 1
+        org_data = await load(org_id)
+        if not org_data:
+            self._entries.pop(org_id, None)
+            return org_data, None
+        etag = org_etag(org_data)
+        self._entries[org_id] = (version, time.monotonic() + ORG_CACHE_TTL, org_data, etag)
+        return org_data, etag
+
+    async def invalidate(self, org_id: str):
+        self._entries.pop(org_id, None)
+        try:
+            redis = get_redis_database()
+            await redis.incr(_version_key(org_id))
+        except Exception as e:
+            logger.warning(f"Redis - bumping org config version failed, other nodes refresh after {ORG_CACHE_TTL}s: {e}")
+
+
+org_config_cache = OrgConfigCache()
+
+
+def get_org_cache_stats() -> dict:
+    lookups = _stats["hits"] + _stats["misses"]
+    return {**_stats, "hit_rate": round(_stats["hits"] / lookups, 3) if lookups else None}
@@ -0,0 +1,100 @@
+import os
+import time
+import asyncio
+import logging
+from db import get_database
+from redis import get_redis_database
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+PRICE_CACHE_TTL = float(os.environ.get("PRICE_CACHE_TTL", 60))
+# also refresh on a Mongo change stream, needs a replica set
+PRICE_CHANGE_STREAM = os.environ.get("PRICE_CHANGE_STREAM", "").lower() in ("1", "true", "yes")
+PRICE_VERSION_KEY = "prices_version"
+
+_stats = {"hits": 0, "loads": 0}
+
+
+class PriceCatalog:
+    """The apparel -> price map, held in memory.
+
+    It is reloaded after PRICE_CACHE_TTL seconds, when the prices_version
+    counter in Redis moves (bumped by PricesOperations.create and remove on
+    any node) or when the change stream sees a write to Prices.
+    """
+
+    def __init__(self):
+        self._prices = None
+        self._version = None
+        self._expires_at = 0.0
+        self._lock = asyncio.Lock()
+
+    async def _current_version(self):
+        try:
+            redis = get_redis_database()
+            return await redis.get(PRICE_VERSION_KEY, encoding="utf-8")
+        except Exception as e:
+            logger.warning(f"Redis - reading prices version failed: {e}")
+            return self._version
+
+    def _fresh(self, version) -> bool:
+        return self._prices is not None and self._version == version and self._expires_at > time.monotonic()
+
+    async def get(self, load) -> dict:
+        """Returns the cached map, calling `load()` when it is stale. Concurrent callers share one load."""
+        version = await self._current_version()
+        if self._fresh(version):
+            _stats["hits"] += 1
+            return self._prices
+        async with self._lock:
+            if self._fresh(version):
+                _stats["hits"] += 1
+                return self._prices
+            prices = await load()
+            _stats["loads"] += 1
+            self._prices, self._version, self._expires_at = prices, version, time.monotonic() + PRICE_CACHE_TTL
+            return prices
+
+    def invalidate_local(self):
+        self._prices = None
+
+    async def invalidate(self):
+        self.invalidate_local()
+        try:
+            redis = get_redis_database()
+            await redis.incr(PRICE_VERSION_KEY)
+        except Exception as e:
+            logger.warning(f"Redis - bumping prices version failed, other nodes refresh after {PRICE_CACHE_TTL}s: {e}")
+
+
+price_catalog = PriceCatalog()
+_watch_task = None
+
+
+async def _watch_prices():
+    try:
+        async with get_database().Prices.watch() as stream:
+            async for change in stream:
+                price_catalog.invalidate_local()
+    except asyncio.CancelledError:
+        raise
+    except Exception as e:
+        logger.warning(f"Mongo - prices change stream stopped, refreshing every {PRICE_CACHE_TTL}s instead: {e}")
+
+
+async def start_price_watch():
+    global _watch_task
+    if PRICE_CHANGE_STREAM and _watch_task is None:
+        _watch_task = asyncio.create_task(_watch_prices(), name="price-watch")
+
+
+async def stop_price_watch():
+    global _watch_task
+    if _watch_task:
+        _watch_task.cancel()
+        _watch_task = None
+
+
+def get_price_catalog_stats() -> dict:
+    return dict(_stats)
@@ -0,0 +1,71 @@
+import os
+import json
+import time
+import hashlib
+import logging
+from redis import get_redis_database
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+PROMPT_CACHE_PREFIX = "prompt_cache"
+PROMPT_CACHE_INDEX = f"{PROMPT_CACHE_PREFIX}:index"  # sorted set of cache keys scored by write time
+PROMPT_CACHE_TTL = int(os.environ.get("PROMPT_CACHE_TTL", 7 * 24 * 3600))
+PROMPT_CACHE_MAX_ENTRIES = int(os.environ.get("PROMPT_CACHE_MAX_ENTRIES", 10000))
+
+_stats = {"hits": 0, "misses": 0}
+
+
+def normalize_prompt(prompt: str) -> str:
+    return " ".join(prompt.lower().split())
+
+
+def _cache_key(prompt: str) -> str:
+    digest = hashlib.sha256(normalize_prompt(prompt).encode("utf-8")).hexdigest()
+    return f"{PROMPT_CACHE_PREFIX}:{digest}"
+
+
+async def get_cached_prompts(prompt: str):
+    """Returns the cached {"Prompts": [...]} for this prompt, with Prompt1 set to the prompt as typed."""
+    try:
+        redis = get_redis_database()
+        cached = await redis.get(_cache_key(prompt))
+        if cached:
+            _stats["hits"] += 1
+            await redis.incr(f"{PROMPT_CACHE_PREFIX}:hits")
+            prompts = json.loads(cached)
+            prompts["Prompts"][0]["Prompt1"] = prompt
+            return prompts
+        _stats["misses"] += 1
+        await redis.incr(f"{PROMPT_CACHE_PREFIX}:misses")
+    except Exception as e:
+        logger.warning(f"Redis - prompt cache read error: {e}")
+    return None
+
+
+async def cache_prompts(prompt: str, response_json: dict):
+    """Stores a response that already passed validate_structure, evicting the oldest entries past the size cap."""
+    prompts = {item_key: item[item_key] for item in response_json["Prompts"] for item_key in item}
+    value = json.dumps({"Prompts": [{f"Prompt{i}": prompts[f"Prompt{i}"]} for i in range(1, 4)]})
+    key = _cache_key(prompt)
+    now = time.time()
+    try:
+        redis = get_redis_database()
+        transaction = redis.multi_exec()
+        transaction.set(key, value, expire=PROMPT_CACHE_TTL)
+        transaction.zadd(PROMPT_CACHE_INDEX, now, key)
+        transaction.zremrangebyscore(PROMPT_CACHE_INDEX, max=now - PROMPT_CACHE_TTL)
+        transaction.zcard(PROMPT_CACHE_INDEX)
+        *_, size = await transaction.execute()
+        if size > PROMPT_CACHE_MAX_ENTRIES:
+            oldest = await redis.zrange(PROMPT_CACHE_INDEX, 0, size - PROMPT_CACHE_MAX_ENTRIES - 1)
+            if oldest:
+                await redis.delete(*oldest)
+                await redis.zrem(PROMPT_CACHE_INDEX, *oldest)
+    except Exception as e:
+        logger.warning(f"Redis - prompt cache write error: {e}")
+
+
+def get_prompt_cache_stats() -> dict:
+    total = _stats["hits"] + _stats["misses"]
+    return {**_stats, "hit_rate": round(_stats["hits"] / total, 3) if total else 0.0}
@@ -4,15 +4,14 @@ from models.BrowsedImageDataModel import BrowsedImageDataModel
 from database.BASE import BaseDatabaseOperation
 from fastapi import HTTPException  # , Request
 import logging
-import base64
-import io
-from PIL import Image
-import boto3
-from botocore.client import Config
+from aws_utils import image_url, upload_image, run_upload, gather_uploads
+from utils.image_pipeline import FULL, Rendition, decode_data_url, transcode_image, upload_renditions
 from botocore.exceptions import NoCredentialsError
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+BROWSE_IMAGE_BUCKET = "browse-image-v2"
+
 async def record_prompt_and_image(
     image: str,
     browsed_data: BrowsedImageDataModel,
@@ -20,7 +19,7 @@ async def record_prompt_and_image(
     user_id: str,
 ):
     try:
-        if processAndSaveImage(image, browsed_data.img_id):
+        if await processAndSaveImage(image, browsed_data.img_id):
             result = await db_ops.create(user_id, browsed_data)
             logger.info(f"Image recorded: {result}")
             return True
@@ -29,25 +28,38 @@ async def record_prompt_and_image(
         raise HTTPException(status_code=500, detail={'message':"Internal Server Error", 'currentFrame': getframeinfo(currentframe()), 'detail': str(traceback.format_exc())})
     
 
-def processAndSaveImage(image_data: str, img_id: str):
+async def record_browsed_image(
+    browsed_data: BrowsedImageDataModel,
+    db_ops: BaseDatabaseOperation,
+    user_id: str,
+):
+    """Records an image that was already uploaded at generation time (see upload_browse_image)."""
+    try:
+        result = await db_ops.create(user_id, browsed_data)
+        logger.info(f"Image recorded: {result}")
+        return True
+    except Exception as error:
+        logger.error(f"Error in record_browsed_image: {error}")
+        raise HTTPException(status_code=500, detail={'message':"Internal Server Error", 'currentFrame': getframeinfo(currentframe()), 'detail': str(traceback.format_exc())})
+
+
+def browse_image_url(img_id: str):
+    return image_url(img_id, BROWSE_IMAGE_BUCKET)
+
+
+def upload_browse_image(image_bytes: bytes, img_id: str, rendition: Rendition = FULL):
+    """Blocking upload of an already transcoded image, run it in an executor from async code."""
+    upload_image(image_bytes, BROWSE_IMAGE_BUCKET, f"{img_id}.{rendition.extension}", rendition.content_type)
+
+
+async def processAndSaveImage(image_data: str, img_id: str):
     try:
-        image_bytes = base64.b64decode(image_data)
-        image = Image.open(io.BytesIO(image_bytes))
-        buffered = io.BytesIO()
-        image.save(buffered, format="JPEG", quality=85)
-        compressed_image_bytes = buffered.getvalue()
-        s3_client = boto3.client('s3', region_name='us-east-2',
-                  config=Config(signature_version='s3v4'))
-
-        image_key = f"{img_id}.jpg"
-        s3_bucket_name = "browse-image-v2"  # Replace with your bucket name
-
-        s3_client.upload_fileobj(
-            io.BytesIO(compressed_image_bytes),
-            s3_bucket_name,
-            image_key,
-            ExtraArgs={"ACL": "public-read", "ContentType": "image/jpeg", "ContentDisposition": "inline"},
-        )
+        renditions = upload_renditions(FULL)
+        outputs, _ = await transcode_image(decode_data_url(image_data), renditions)
+        await gather_uploads(*(
+            run_upload(upload_browse_image, outputs[rendition.name], img_id, rendition)
+            for rendition in renditions
+        ))
         return True
     except NoCredentialsError:
         logger.error("No AWS credentials found")
@@ -0,0 +1,61 @@
+import os
+import json
+import asyncio
+import logging
+from ai_models.router import get_provider_stats
+from ai_models.scheduler import get_scheduler_stats
+from aws_utils import get_client_stats, get_presign_stats
+from utils.analysis_sink import get_analysis_sink_stats
+from utils.asset_cache import get_asset_cache_stats
+from utils.image_pipeline import get_pipeline_stats
+from utils.moderation import get_profanity_stats
+from utils.org_cache import get_org_cache_stats
+from utils.price_catalog import get_price_catalog_stats
+from utils.prompt_cache import get_prompt_cache_stats
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# seconds between two stats log lines, 0 turns the log off
+STATS_LOG_INTERVAL = float(os.environ.get("STATS_LOG_INTERVAL", 300))
+
+_log_task = None
+
+
+def collect_stats() -> dict:
+    """Queue depths, hit rates and breaker states of this process, served by /stats."""
+    return {
+        "provider_schedulers": get_scheduler_stats(),
+        "providers": get_provider_stats(),
+        "aws_clients": get_client_stats(),
+        "presigned_urls": get_presign_stats(),
+        "prompt_cache": get_prompt_cache_stats(),
+        "profanity_screener": get_profanity_stats(),
+        "image_pipeline": get_pipeline_stats(),
+        "analysis_sink": get_analysis_sink_stats(),
+        "org_cache": get_org_cache_stats(),
+        "price_catalog": get_price_catalog_stats(),
+        "asset_cache": get_asset_cache_stats(),
+    }
+
+
+async def _log_stats_periodically():
+    while True:
+        await asyncio.sleep(STATS_LOG_INTERVAL)
+        try:
+            logger.info(f"Runtime stats: {json.dumps(collect_stats(), default=str)}")
+        except Exception as e:
+            logger.error(f"Error collecting runtime stats: {e}")
+
+
+async def start_stats_log():
+    global _log_task
+    if STATS_LOG_INTERVAL > 0 and _log_task is None:
+        _log_task = asyncio.create_task(_log_stats_periodically(), name="runtime-stats")
+
+
+async def stop_stats_log():
+    global _log_task
+    if _log_task:
+        _log_task.cancel()
+        _log_task = None
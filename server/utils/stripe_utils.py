@@ -1,5 +1,7 @@
 from typing import List
 from models.ItemModel import ItemModel
+from aws_utils import CART_THUMBNAIL_BUCKET
+from utils.image_pipeline import FULL
 
 
 async def capitalize_first_letter(word: str) -> str:
@@ -8,6 +10,21 @@ async def capitalize_first_letter(word: str) -> str:
     else:
         return word
 
+
+def checkout_image_uploads(products: List[ItemModel]) -> list:
+    """Points every item that still carries a data URL thumbnail or edited image at its S3 id
+    and returns the uploads to pass to processAndSaveImages."""
+    uploads = []
+    for item in products:
+        if item.thumbnail and item.thumbnail.startswith("data:image"):
+            thumbnail_img_id = "t_" + item.img_id
+            uploads.append((item.thumbnail, thumbnail_img_id, CART_THUMBNAIL_BUCKET, FULL))
+            item.thumbnail = thumbnail_img_id
+        if item.toggled and isinstance(item.toggled, str) and item.toggled.startswith("data:image"):
+            uploads.append((item.toggled, f"e_{item.img_id}", "browse-image-v2", FULL))
+            item.toggled = True
+    return uploads
+
 # async def convert_checkout_to_item(checkout_models: List[SingleCheckoutModel]):
 #     item_models = []
 
@@ -0,0 +1,121 @@
+import asyncio
+import json
+import logging
+import uuid
+from redis import get_redis_database
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+TASK_EVENT_CHANNEL = "task-events"
+TASK_EVENT_POLL_INTERVAL = 5  # fallback re-check if a notification is missed (e.g. listener down)
+
+# Identifies this process so the pub/sub listener can skip events it already delivered locally
+NODE_ID = str(uuid.uuid4())
+
+_subscriptions = {}
+_cancel_handlers = []
+_listener_task = None
+
+
+class TaskEventSubscription:
+    """Wakes a waiter whenever an image of the given task changes state.
+
+    Enter the subscription *before* reading the task state so that a
+    notification sent between the read and the wait is not lost.
+    """
+
+    def __init__(self, user_id: str, task_id: str):
+        self.key = (user_id, task_id)
+        self.event = asyncio.Event()
+
+    def __enter__(self):
+        _subscriptions.setdefault(self.key, set()).add(self)
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        subscribers = _subscriptions.get(self.key)
+        if subscribers:
+            subscribers.discard(self)
+            if not subscribers:
+                del _subscriptions[self.key]
+
+    async def wait(self, timeout: float) -> bool:
+        try:
+            await asyncio.wait_for(self.event.wait(), timeout)
+            return True
+        except asyncio.TimeoutError:
+            return False
+        finally:
+            self.event.clear()
+
+
+def subscribe_task_events(user_id: str, task_id: str) -> TaskEventSubscription:
+    return TaskEventSubscription(user_id, task_id)
+
+
+def _notify_local(user_id: str, task_id: str):
+    for subscription in _subscriptions.get((user_id, task_id), ()):
+        subscription.event.set()
+
+
+async def publish_task_event(user_id: str, task_id: str, index=None):
+    _notify_local(user_id, task_id)
+    try:
+        redis = get_redis_database()
+        message = {"node": NODE_ID, "user_id": user_id, "task_id": task_id, "index": index}
+        await redis.publish(TASK_EVENT_CHANNEL, json.dumps(message))
+    except Exception as e:
+        logger.warning(f"Redis - publishing task event failed: {e}")
+
+
+def register_cancel_handler(handler):
+    """`handler(user_id, task_id, index)` is called on every node when an image index is no longer wanted."""
+    _cancel_handlers.append(handler)
+
+
+def _cancel_local(user_id: str, task_id: str, index: int):
+    for handler in _cancel_handlers:
+        handler(user_id, task_id, index)
+
+
+async def publish_task_cancel(user_id: str, task_id: str, index: int):
+    _cancel_local(user_id, task_id, index)
+    try:
+        redis = get_redis_database()
+        message = {"node": NODE_ID, "user_id": user_id, "task_id": task_id, "cancel": index}
+        await redis.publish(TASK_EVENT_CHANNEL, json.dumps(message))
+    except Exception as e:
+        logger.warning(f"Redis - publishing task cancel failed: {e}")
+
+
+async def _listen(channel):
+    while await channel.wait_message():
+        try:
+            message = await channel.get_json()
+            if not message or message.get("node") == NODE_ID:
+                continue
+            if "cancel" in message:
+                _cancel_local(message["user_id"], message["task_id"], message["cancel"])
+            else:
+                _notify_local(message["user_id"], message["task_id"])
+        except Exception as e:
+            logger.warning(f"Redis - malformed task event: {e}")
+
+
+async def start_task_event_listener():
+    global _listener_task
+    redis = get_redis_database()
+    channel, = await redis.subscribe(TASK_EVENT_CHANNEL)
+    _listener_task = asyncio.create_task(_listen(channel), name="task-event-listener")
+    print("listening for task events")
+
+
+async def stop_task_event_listener():
+    global _listener_task
+    if _listener_task:
+        redis = get_redis_database()
+        if redis and not redis.closed:
+            await redis.unsubscribe(TASK_EVENT_CHANNEL)
+        _listener_task.cancel()
+        _listener_task = None
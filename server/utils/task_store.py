@@ -0,0 +1,143 @@
+import json
+import logging
+from redis import get_redis_database
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Task state is one hash per task with a field per value that changes independently:
+#   status, prompts (JSON list), total_time_taken, image_status:{idx}, time_taken:{idx}
+# with times in seconds
+# so concurrent callbacks update their own fields with single atomic commands instead of
+# rewriting a shared JSON blob under a lock.
+IMAGE_STATUS_PREFIX = "image_status:"
+TIME_TAKEN_PREFIX = "time_taken:"
+
+# HSET the given field/value pairs, but only while the task still exists
+SET_IF_EXISTS_SCRIPT = """
+if redis.call('EXISTS', KEYS[1]) == 0 then
+    return 0
+end
+redis.call('HSET', KEYS[1], unpack(ARGV))
+return 1
+"""
+
+# ARGV = expected, replacement, field... ; replaces each field still holding `expected`
+COMPARE_AND_SET_SCRIPT = """
+local changed = 0
+for i = 3, #ARGV do
+    if redis.call('HGET', KEYS[1], ARGV[i]) == ARGV[1] then
+        redis.call('HSET', KEYS[1], ARGV[i], ARGV[2])
+        changed = changed + 1
+    end
+end
+return changed
+"""
+
+# ARGV = slot count, final status, total time ; counts a finished image slot and
+# settles the task once every slot is done, wherever the slots ran
+FINISH_SLOT_SCRIPT = """
+if redis.call('EXISTS', KEYS[1]) == 0 then
+    return 0
+end
+local finished = redis.call('HINCRBY', KEYS[1], 'slots_finished', 1)
+if finished == tonumber(ARGV[1]) then
+    redis.call('HSET', KEYS[1], 'status', ARGV[2], 'total_time_taken', ARGV[3])
+    return 2
+end
+return 1
+"""
+
+
+def task_key(user_id: str, task_id: str) -> str:
+    return f"user:{user_id}:tasks:{task_id}"
+
+
+def _to_fields(task_info: dict) -> dict:
+    fields = {}
+    for name, value in task_info.items():
+        if name in ("image_status", "time_taken"):
+            for index, item in value.items():
+                fields[f"{name}:{index}"] = item
+        elif name == "prompts":
+            fields[name] = json.dumps(value)
+        else:
+            fields[name] = value
+    return fields
+
+
+def _from_fields(fields: dict) -> dict:
+    task_info = {"image_status": {}, "time_taken": {}}
+    for name, value in fields.items():
+        if name.startswith(IMAGE_STATUS_PREFIX):
+            task_info["image_status"][name[len(IMAGE_STATUS_PREFIX):]] = value
+        elif name.startswith(TIME_TAKEN_PREFIX):
+            task_info["time_taken"][name[len(TIME_TAKEN_PREFIX):]] = value
+        elif name == "prompts":
+            task_info[name] = json.loads(value)
+        else:
+            task_info[name] = value
+    return task_info
+
+
+async def create_task(user_id: str, task_id: str, task_info: dict, ttl: int):
+    """Writes a new task that Redis removes by itself after `ttl` seconds."""
+    redis = get_redis_database()
+    transaction = redis.multi_exec()
+    transaction.hmset_dict(task_key(user_id, task_id), _to_fields(task_info))
+    transaction.expire(task_key(user_id, task_id), ttl)
+    await transaction.execute()
+
+
+async def get_task(user_id: str, task_id: str):
+    """Returns the task as {status, prompts, image_status: {idx: ...}, time_taken: {idx: ...}, ...} or None."""
+    redis = get_redis_database()
+    fields = await redis.hgetall(task_key(user_id, task_id))
+    return _from_fields(fields) if fields else None
+
+
+async def get_image_status(user_id: str, task_id: str, index):
+    """The status of one image, None if the task is gone."""
+    redis = get_redis_database()
+    return await redis.hget(task_key(user_id, task_id), f"{IMAGE_STATUS_PREFIX}{index}")
+
+
+async def update_task(user_id: str, task_id: str, **fields) -> bool:
+    """Atomically sets top level fields (status, prompts, ...), returns False if the task is gone."""
+    return await _set_if_exists(user_id, task_id, _to_fields(fields))
+
+
+async def set_image_result(user_id: str, task_id: str, index, status: str, time_taken: str = None) -> bool:
+    fields = {f"{IMAGE_STATUS_PREFIX}{index}": status}
+    if time_taken is not None:
+        fields[f"{TIME_TAKEN_PREFIX}{index}"] = time_taken
+    return await _set_if_exists(user_id, task_id, fields)
+
+
+async def replace_image_status(user_id: str, task_id: str, indexes, expected: str, replacement: str) -> int:
+    """Moves each image in `indexes` from `expected` to `replacement`, returns how many changed."""
+    redis = get_redis_database()
+    fields = [f"{IMAGE_STATUS_PREFIX}{index}" for index in indexes]
+    return await redis.eval(COMPARE_AND_SET_SCRIPT, keys=[task_key(user_id, task_id)], args=[expected, replacement, *fields])
+
+
+async def finish_slot(user_id: str, task_id: str, slot_count: int, total_time_taken: str) -> int:
+    """Returns 0 if the task is gone, 1 if slots are still running and 2 once this was the last slot."""
+    redis = get_redis_database()
+    return await redis.eval(FINISH_SLOT_SCRIPT, keys=[task_key(user_id, task_id)], args=[slot_count, "completed", total_time_taken])
+
+
+async def delete_task(user_id: str, task_id: str, *related_keys):
+    """Deletes the task and any `related_keys` (e.g. its images) with a single DEL."""
+    redis = get_redis_database()
+    await redis.delete(task_key(user_id, task_id), *related_keys)
+
+
+async def _set_if_exists(user_id: str, task_id: str, fields: dict) -> bool:
+    redis = get_redis_database()
+    args = [item for pair in fields.items() for item in pair]
+    try:
+        return bool(await redis.eval(SET_IF_EXISTS_SCRIPT, keys=[task_key(user_id, task_id)], args=args))
+    except Exception as e:
+        logger.warning(f"Redis - updating task {task_id} failed: {e}")
+        return False
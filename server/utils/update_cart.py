@@ -1,6 +1,7 @@
 import traceback
 from inspect import currentframe, getframeinfo
-from aws_utils import processAndSaveImage
+from aws_utils import processAndSaveImages, CART_THUMBNAIL_BUCKET
+from utils.image_pipeline import FULL
 from fastapi import HTTPException
 from database.BASE import BaseDatabaseOperation
 from models.ItemModel import ItemModel
@@ -13,10 +14,11 @@ async def add_to_cart(product_info: ItemModel, user_id: str, db_ops: CartOperati
     try:
         thumbnail = product_info.thumbnail
         thumbnail_id = f"t_{product_info.img_id}"
-        processAndSaveImage(thumbnail, thumbnail_id, "thumbnails-cart")
+        uploads = [(thumbnail, thumbnail_id, CART_THUMBNAIL_BUCKET, FULL)]
         if product_info.toggled and product_info.toggled.startswith("data:image"):
-            processAndSaveImage(product_info.toggled, f"e_{product_info.img_id}", "browse-image-v2")
+            uploads.append((product_info.toggled, f"e_{product_info.img_id}", "browse-image-v2", FULL))
             product_info.toggled = True
+        await processAndSaveImages(uploads)
             
         product_info.thumbnail = thumbnail_id
         result = await db_ops.create(user_id, product_info)
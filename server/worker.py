@@ -0,0 +1,148 @@
+"""Image generation worker.
+
+Consumes the image slots that /ask_gpt enqueues when IMAGE_GENERATION_MODE=queue
+and writes the results back to the task hashes, so generation can run (and
+scale) on machines separate from the API. Run from the server directory:
+
+    python worker.py
+"""
+import os
+import json
+import socket
+import signal
+import asyncio
+import logging
+from dotenv import load_dotenv
+
+load_dotenv()
+
+from redis import connect_to_redis, close_redis_connection, get_redis_database
+from utils.task_events import start_task_event_listener, stop_task_event_listener
+from utils.image_pipeline import start_image_pipeline, stop_image_pipeline
+from utils.image_generation import run_image_job, task_timeout, IMAGE_JOB_STREAM, IMAGE_JOB_GROUP
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# image slots run at once by this worker, each slot calls the primary and the secondary provider
+WORKER_CONCURRENCY = int(os.environ.get("IMAGE_WORKER_CONCURRENCY", 6))
+# stable per machine so a restarted worker picks its own unacknowledged jobs back up
+WORKER_NAME = os.environ.get("IMAGE_WORKER_NAME", socket.gethostname())
+WORKER_BLOCK_MS = 5000
+# jobs left unacknowledged this long by another (dead) worker are taken over
+JOB_CLAIM_IDLE_MS = int(os.environ.get("IMAGE_JOB_CLAIM_IDLE_MS", 120000))
+JOB_CLAIM_INTERVAL = 30
+SHUTDOWN_GRACE = int(os.environ.get("IMAGE_WORKER_SHUTDOWN_GRACE", 30))
+
+
+async def ensure_consumer_group():
+    redis = get_redis_database()
+    try:
+        await redis.xgroup_create(IMAGE_JOB_STREAM, IMAGE_JOB_GROUP, latest_id='0', mkstream=True)
+    except Exception as e:
+        if "BUSYGROUP" not in str(e):
+            raise
+
+
+async def process_job(message_id, fields):
+    try:
+        job = json.loads(fields["job"])
+        await asyncio.wait_for(run_image_job(job), task_timeout + 30)
+    except asyncio.CancelledError:
+        raise # left pending, another worker claims it
+    except Exception as e:
+        logger.error(f"Image job {message_id} failed: {e}", exc_info=True)
+    redis = get_redis_database()
+    await redis.xack(IMAGE_JOB_STREAM, IMAGE_JOB_GROUP, message_id)
+
+
+class ImageWorker:
+    def __init__(self, concurrency: int):
+        self.concurrency = concurrency
+        self.running = set()
+        self.stopping = asyncio.Event()
+
+    def start_job(self, message_id, fields):
+        task = asyncio.create_task(process_job(message_id, fields), name=f"image-job-{message_id}")
+        self.running.add(task)
+        task.add_done_callback(self.running.discard)
+
+    async def wait_for_capacity(self):
+        while len(self.running) >= self.concurrency and not self.stopping.is_set():
+            await asyncio.wait(self.running, return_when=asyncio.FIRST_COMPLETED)
+
+    async def consume(self):
+        redis = get_redis_database()
+        latest_id = '0' # replay this worker's own pending jobs first, then read new ones
+        while not self.stopping.is_set():
+            await self.wait_for_capacity()
+            if self.stopping.is_set():
+                break
+            messages = await redis.xread_group(
+                IMAGE_JOB_GROUP, WORKER_NAME, [IMAGE_JOB_STREAM],
+                timeout=WORKER_BLOCK_MS, count=self.concurrency - len(self.running), latest_ids=[latest_id]
+            )
+            if latest_id != '>':
+                if not messages:
+                    latest_id = '>'
+                    continue
+                latest_id = messages[-1][1]
+            for _, message_id, fields in messages:
+                self.start_job(message_id, fields)
+
+    async def claim_stale_jobs(self):
+        redis = get_redis_database()
+        while not self.stopping.is_set():
+            try:
+                await asyncio.wait_for(self.stopping.wait(), JOB_CLAIM_INTERVAL)
+                break
+            except asyncio.TimeoutError:
+                pass
+            free = self.concurrency - len(self.running)
+            if free <= 0:
+                continue
+            try:
+                pending = await redis.xpending(IMAGE_JOB_STREAM, IMAGE_JOB_GROUP, '-', '+', free)
+                stale = [message_id for message_id, consumer, idle, _ in pending if consumer != WORKER_NAME and idle >= JOB_CLAIM_IDLE_MS]
+                if stale:
+                    claimed = await redis.xclaim(IMAGE_JOB_STREAM, IMAGE_JOB_GROUP, WORKER_NAME, JOB_CLAIM_IDLE_MS, *stale)
+                    logger.info(f"Claimed {len(claimed)} stale image jobs")
+                    for message_id, fields in claimed:
+                        self.start_job(message_id, fields)
+            except Exception as e:
+                logger.warning(f"Redis - claiming stale image jobs failed: {e}")
+
+    async def run(self):
+        logger.info(f"Image worker {WORKER_NAME} started with concurrency {self.concurrency}")
+        claimer = asyncio.create_task(self.claim_stale_jobs())
+        try:
+            await self.consume()
+        finally:
+            self.stopping.set()
+            await claimer
+            if self.running:
+                logger.info(f"Waiting up to {SHUTDOWN_GRACE}s for {len(self.running)} image jobs")
+                done, pending = await asyncio.wait(self.running, timeout=SHUTDOWN_GRACE)
+                for task in pending:
+                    task.cancel()
+
+
+async def main():
+    await connect_to_redis()
+    await ensure_consumer_group()
+    await start_image_pipeline()
+    await start_task_event_listener() # cancellations published by the API
+    worker = ImageWorker(WORKER_CONCURRENCY)
+    loop = asyncio.get_running_loop()
+    for s in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(s, worker.stopping.set)
+    try:
+        await worker.run()
+    finally:
+        await stop_task_event_listener()
+        await stop_image_pipeline()
+        await close_redis_connection()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())